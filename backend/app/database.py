@@ -19,6 +19,7 @@ import aiosqlite
 _IS_TESTING = (
     "pytest" in sys.modules
     or "PYTEST_CURRENT_TEST" in os.environ
+    or "PYTEST_XDIST_WORKER" in os.environ
     or "pytest" in os.environ.get("_", "")
     or any("pytest" in arg for arg in sys.argv)
     or os.environ.get("FORCE_TEST_DB", "").lower() in ("1", "true", "yes")
@@ -30,12 +31,19 @@ _IS_TESTING = (
     any("pytest" in arg for arg in os.environ.get("PYTEST_ARGS", "").split())
 )
 
+
+def get_test_temp_dir_prefix() -> str:
+    """Temp dir prefix for test databases, tagged with the pytest-xdist worker"""
+    worker = os.environ.get("PYTEST_XDIST_WORKER")
+    return f"golden_nuggets_test_{worker}_" if worker else "golden_nuggets_test_"
+
+
 # Use different database paths for testing vs production
 if _IS_TESTING:
     # Use a temporary database for tests - each test session gets its own
     # In Docker, ensure we use /tmp which is not mounted as a volume
     temp_base = "/tmp" if os.path.exists("/tmp") else tempfile.gettempdir()
-    _temp_dir = tempfile.mkdtemp(prefix="golden_nuggets_test_", dir=temp_base)
+    _temp_dir = tempfile.mkdtemp(prefix=get_test_temp_dir_prefix(), dir=temp_base)
     DATABASE_PATH = os.path.join(_temp_dir, "test_feedback.db")
     print(f"🧪 Test environment detected: Using isolated database at {DATABASE_PATH}")
 else:
@@ -45,13 +53,25 @@ else:
     print(f"📊 Production environment: Using database at {DATABASE_PATH}")
 
 
+# Per-connection settings applied on every open: synchronous=NORMAL only
+# fsyncs at WAL checkpoints, the larger page cache / in-memory temp store keep
+# dashboard aggregates off disk, and busy_timeout waits out a concurrent writer.
+# journal_mode is persisted in the file, so init_database() sets WAL once.
+CONNECTION_PRAGMAS = (
+    "PRAGMA foreign_keys = ON",
+    "PRAGMA synchronous = NORMAL",
+    "PRAGMA temp_store = MEMORY",
+    "PRAGMA cache_size = -64000",
+    "PRAGMA busy_timeout = 5000",
+)
+
+
 @asynccontextmanager
 async def get_db() -> AsyncGenerator[aiosqlite.Connection, None]:
     """Get async database connection with proper cleanup"""
     async with aiosqlite.connect(DATABASE_PATH) as db:
-        # Enable foreign keys
-        await db.execute("PRAGMA foreign_keys = ON")
-        await db.commit()
+        for pragma in CONNECTION_PRAGMAS:
+            await db.execute(pragma)
         yield db
 
 
@@ -65,6 +85,11 @@ async def init_database():
     migration_runner = MigrationRunner(DATABASE_PATH)
     await migration_runner.run_pending_migrations()
 
+    # WAL lets readers run while a writer commits; the mode is stored in the
+    # database file, so it only needs setting once
+    async with aiosqlite.connect(DATABASE_PATH) as db:
+        await db.execute("PRAGMA journal_mode = WAL")
+
     print(f"Database initialized successfully at {DATABASE_PATH}")
 
 
@@ -102,6 +127,7 @@ def get_database_info():
         "detection_methods": {
             "pytest_in_modules": "pytest" in sys.modules,
             "pytest_current_test": "PYTEST_CURRENT_TEST" in os.environ,
+            "xdist_worker": os.environ.get("PYTEST_XDIST_WORKER"),
             "pytest_in_args": any("pytest" in arg for arg in sys.argv),
             "force_test_db": os.environ.get("FORCE_TEST_DB", "").lower()
             in ("1", "true", "yes"),
@@ -134,7 +160,7 @@ def reset_database_for_test():
         )
 
     # Create a new temporary directory and database path
-    _temp_dir = tempfile.mkdtemp(prefix="golden_nuggets_test_")
+    _temp_dir = tempfile.mkdtemp(prefix=get_test_temp_dir_prefix())
     DATABASE_PATH = os.path.join(_temp_dir, "test_feedback.db")
 
 
@@ -517,6 +517,29 @@ async def list_chrome_extension_prompts():
 
 # Monitoring and observability endpoints
 
+# Seconds a successful /monitor/health database probe is reused, so bursts of
+# health checks share one SELECT 1 instead of each opening a connection
+HEALTH_DB_PROBE_TTL = 1.0
+_health_db_probe = {"checked_at": 0.0}
+
+
+async def _check_database_accessible() -> bool:
+    """Probe the database, reusing a recent successful probe"""
+    now = time.monotonic()
+    if now - _health_db_probe["checked_at"] < HEALTH_DB_PROBE_TTL:
+        return True
+
+    try:
+        async with get_db() as db:
+            await db.execute("SELECT 1")
+    except Exception:
+        # Failures are never cached: the next check probes again
+        _health_db_probe["checked_at"] = 0.0
+        return False
+
+    _health_db_probe["checked_at"] = now
+    return True
+
 
 @app.get("/monitor/health", response_model=SystemHealthResponse)
 async def get_system_health():
@@ -535,12 +558,7 @@ async def get_system_health():
         gemini_configured = bool(os.getenv("GEMINI_API_KEY"))
 
         # Check database accessibility
-        database_accessible = True
-        try:
-            async with get_db() as db:
-                await db.execute("SELECT 1")
-        except Exception:
-            database_accessible = False
+        database_accessible = await _check_database_accessible()
 
         # Determine overall health status
         if not database_accessible:
@@ -9,6 +9,7 @@ prompt optimization based on feedback data.
 import asyncio
 from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timezone
+import functools
 
 # DSPy imports with graceful handling
 import importlib.util
@@ -30,6 +31,9 @@ if not DSPY_AVAILABLE:
 # Configure logging
 logger = logging.getLogger(__name__)
 
+# Rows pulled from SQLite per batch while streaming feedback into training data
+FEEDBACK_FETCH_CHUNK_SIZE = 512
+
 
 class DSPyMultiModelManager:
     """DSPy system that handles optimization for different models separately"""
@@ -58,8 +62,10 @@ class DSPyMultiModelManager:
         self.min_feedback_threshold = 50
         self.min_training_examples = 10
 
-    def _get_baseline_prompt(self, provider_name: str) -> str:
-        """Get provider-specific baseline prompt"""
+    @staticmethod
+    @functools.lru_cache(maxsize=16)
+    def _get_baseline_prompt(provider_name: str) -> str:
+        """Get provider-specific baseline prompt (pure, so cached per name)"""
         return f"""
 You are an expert at identifying golden nuggets of insight from web content using {provider_name}.
 
@@ -318,11 +324,7 @@ The JSON structure must be: {{"golden_nuggets": [...]}}
             )
 
             # Clean up active run tracking
-            if (
-                provider_id in self.active_runs_by_provider
-                and run_id in self.active_runs_by_provider[provider_id]
-            ):
-                del self.active_runs_by_provider[provider_id][run_id]
+            self.active_runs_by_provider.get(provider_id, {}).pop(run_id, None)
 
             return {
                 "success": True,
@@ -663,68 +665,65 @@ This prompt is optimized for {provider_id} based on user feedback patterns.
         self, db: aiosqlite.Connection, provider_id: str
     ) -> list[dict]:
         """Get feedback data for a specific provider"""
+        # Fetch both feedback kinds in one round-trip. Each branch keeps its own
+        # ordering and limit, and the leading column tells the rows apart.
         cursor = await db.execute(
             """
-            SELECT nugget_content, original_type, corrected_type, rating, context, url,
-                   model_provider, model_name, created_at
-            FROM nugget_feedback
-            WHERE model_provider = ?
-            ORDER BY created_at DESC
-            LIMIT 500
-            """,
-            (provider_id,),
-        )
-
-        nugget_feedback = await cursor.fetchall()
-
-        # Also get missing content feedback
-        cursor = await db.execute(
-            """
-            SELECT content, suggested_type, context, url, model_provider, model_name, created_at
-            FROM missing_content_feedback
-            WHERE model_provider = ?
-            ORDER BY created_at DESC
-            LIMIT 200
+            SELECT * FROM (
+                SELECT 'nugget', nugget_content, original_type, corrected_type,
+                       rating, context, url, model_provider, model_name, created_at
+                FROM nugget_feedback
+                WHERE model_provider = ?
+                ORDER BY created_at DESC
+                LIMIT 500
+            )
+            UNION ALL
+            SELECT * FROM (
+                SELECT 'missing_content', content, suggested_type, NULL,
+                       NULL, context, url, model_provider, model_name, created_at
+                FROM missing_content_feedback
+                WHERE model_provider = ?
+                ORDER BY created_at DESC
+                LIMIT 200
+            )
             """,
-            (provider_id,),
+            (provider_id, provider_id),
         )
 
-        missing_feedback = await cursor.fetchall()
-
-        # Convert to training format
+        # Convert to training format, streaming rows in batches rather than
+        # materialising the whole result set first
+        cursor.iter_chunk_size = FEEDBACK_FETCH_CHUNK_SIZE
         training_data = []
 
-        # Process nugget feedback
-        for row in nugget_feedback:
-            training_data.append(
-                {
-                    "content": row[0],
-                    "original_type": row[1],
-                    "corrected_type": row[2],
-                    "rating": row[3],
-                    "context": row[4],
-                    "url": row[5],
-                    "model_provider": row[6],
-                    "model_name": row[7],
-                    "created_at": row[8],
-                    "feedback_type": "nugget",
-                }
-            )
-
-        # Process missing content feedback
-        for row in missing_feedback:
-            training_data.append(
-                {
-                    "content": row[0],
-                    "suggested_type": row[1],
-                    "context": row[2],
-                    "url": row[3],
-                    "model_provider": row[4],
-                    "model_name": row[5],
-                    "created_at": row[6],
-                    "feedback_type": "missing_content",
-                }
-            )
+        async for row in cursor:
+            if row[0] == "nugget":
+                training_data.append(
+                    {
+                        "content": row[1],
+                        "original_type": row[2],
+                        "corrected_type": row[3],
+                        "rating": row[4],
+                        "context": row[5],
+                        "url": row[6],
+                        "model_provider": row[7],
+                        "model_name": row[8],
+                        "created_at": row[9],
+                        "feedback_type": "nugget",
+                    }
+                )
+            else:
+                training_data.append(
+                    {
+                        "content": row[1],
+                        "suggested_type": row[2],
+                        "context": row[5],
+                        "url": row[6],
+                        "model_provider": row[7],
+                        "model_name": row[8],
+                        "created_at": row[9],
+                        "feedback_type": "missing_content",
+                    }
+                )
 
         return training_data
 
@@ -736,16 +735,28 @@ This prompt is optimized for {provider_id} based on user feedback patterns.
         provider_id: str,
     ) -> str:
         """Store optimized prompt for specific provider"""
-        # Get next version number for this provider
+        optimized_prompt = optimization_result["optimized_prompt"]
+        model_name = optimization_result.get(
+            "model_name",
+            self._get_default_model(provider_id),
+        )
+
+        # Get next version number for this provider, along with the current
+        # prompt's id if re-optimization produced exactly the same text
         cursor = await db.execute(
             """
-            SELECT COALESCE(MAX(version), 0) + 1
+            SELECT COALESCE(MAX(version), 0) + 1,
+                   MAX(CASE WHEN is_current AND prompt = ? AND model_name = ?
+                       THEN id END)
             FROM optimized_prompts
             WHERE model_provider = ?
             """,
-            (provider_id,),
+            (optimized_prompt, model_name, provider_id),
         )
         result = await cursor.fetchone()
+        if result and result[1]:
+            # Unchanged prompt: keep the current row rather than re-inserting it
+            return result[1]
         version = result[0] if result else 1
 
         prompt_id = str(uuid.uuid4())
@@ -768,17 +779,14 @@ This prompt is optimized for {provider_id} based on user feedback patterns.
             (
                 prompt_id,
                 version,
-                optimization_result["optimized_prompt"],
+                optimized_prompt,
                 datetime.now(timezone.utc),
                 optimization_result["training_examples_count"],
                 optimization_result["performance_score"],
                 True,  # is_current
                 run_id,
                 provider_id,
-                optimization_result.get(
-                    "model_name",
-                    self._get_default_model(provider_id),
-                ),
+                model_name,
             ),
         )
 
@@ -794,16 +802,23 @@ This prompt is optimized for {provider_id} based on user feedback patterns.
         model_name: str,
     ) -> str:
         """Store optimized prompt for specific provider+model combination"""
-        # Get next version number for this provider+model combination
+        optimized_prompt = optimization_result["optimized_prompt"]
+
+        # Get next version number for this provider+model combination, along
+        # with the current prompt's id if re-optimization produced the same text
         cursor = await db.execute(
             """
-            SELECT COALESCE(MAX(version), 0) + 1
+            SELECT COALESCE(MAX(version), 0) + 1,
+                   MAX(CASE WHEN is_current AND prompt = ? THEN id END)
             FROM optimized_prompts
             WHERE model_provider = ? AND model_name = ?
             """,
-            (provider_id, model_name),
+            (optimized_prompt, provider_id, model_name),
         )
         result = await cursor.fetchone()
+        if result and result[1]:
+            # Unchanged prompt: keep the current row rather than re-inserting it
+            return result[1]
         version = result[0] if result else 1
 
         prompt_id = str(uuid.uuid4())
@@ -830,7 +845,7 @@ This prompt is optimized for {provider_id} based on user feedback patterns.
             (
                 prompt_id,
                 version,
-                optimization_result["optimized_prompt"],
+                optimized_prompt,
                 datetime.now(timezone.utc),
                 optimization_result["training_examples_count"],
                 optimization_result["performance_score"],
@@ -849,17 +864,14 @@ This prompt is optimized for {provider_id} based on user feedback patterns.
     ):
         """Log optimization progress for specific provider"""
         try:
-            # Initialize provider tracking if needed
-            if provider_id not in self.active_runs_by_provider:
-                self.active_runs_by_provider[provider_id] = {}
-
-            # Update progress
-            self.active_runs_by_provider[provider_id][run_id] = {
+            # Update progress, creating the provider's tracking dict if needed
+            now = datetime.now(timezone.utc)
+            self.active_runs_by_provider.setdefault(provider_id, {})[run_id] = {
                 "step": step,
                 "progress": progress,
                 "message": message,
-                "timestamp": datetime.now(timezone.utc).isoformat(),
-                "last_updated": datetime.now(timezone.utc),
+                "timestamp": now.isoformat(),
+                "last_updated": now,
                 "provider_id": provider_id,
             }
 
@@ -963,9 +975,7 @@ This prompt is optimized for {provider_id} based on user feedback patterns.
         self, provider_id: str, run_id: str
     ) -> Optional[dict]:
         """Get progress for specific provider optimization run"""
-        if provider_id in self.active_runs_by_provider:
-            return self.active_runs_by_provider[provider_id].get(run_id)
-        return None
+        return self.active_runs_by_provider.get(provider_id, {}).get(run_id)
 
     def get_all_provider_active_runs(self) -> dict:
         """Get all active optimization runs across all providers"""
@@ -990,33 +1000,28 @@ This prompt is optimized for {provider_id} based on user feedback patterns.
         self, db: aiosqlite.Connection, provider_id: str
     ) -> dict:
         """Check if provider should be optimized based on feedback thresholds"""
-        # Get provider feedback stats
+        # Get provider feedback stats and the last optimization date for this
+        # provider in a single round trip
         cursor = await db.execute(
             """
             SELECT COUNT(*) as total_feedback,
                    SUM(CASE WHEN rating = 'negative' THEN 1 ELSE 0 END) as negative_count,
-                   MAX(created_at) as last_feedback
+                   MAX(created_at) as last_feedback,
+                   (
+                       SELECT MAX(completed_at)
+                       FROM optimization_runs
+                       WHERE model_provider = ? AND status = 'completed'
+                   ) as last_optimization
             FROM nugget_feedback
             WHERE model_provider = ?
             """,
-            (provider_id,),
+            (provider_id, provider_id),
         )
         result = await cursor.fetchone()
 
         total_feedback = result[0] if result else 0
         negative_count = result[1] if result else 0
-
-        # Get last optimization date for this provider
-        cursor = await db.execute(
-            """
-            SELECT MAX(completed_at) as last_optimization
-            FROM optimization_runs
-            WHERE model_provider = ? AND status = 'completed'
-            """,
-            (provider_id,),
-        )
-        result = await cursor.fetchone()
-        last_optimization = result[0] if result else None
+        last_optimization = result[3] if result else None
 
         # Calculate metrics
         negative_rate = negative_count / total_feedback if total_feedback > 0 else 0
@@ -127,12 +127,14 @@ class FeedbackService:
         """Store nugget feedback in database with smart deduplication"""
         current_time = datetime.now(timezone.utc)
 
-        # Check for existing record with same content, URL, and original type
+        # Check for existing record with same content, URL, and original type,
+        # fetching the fields to compare in the same query
         cursor = await db.execute(
             """
-            SELECT id, report_count, first_reported_at
+            SELECT id, rating, corrected_type, context
             FROM nugget_feedback
             WHERE nugget_content = ? AND url = ? AND original_type = ?
+            LIMIT 1
             """,
             (feedback.nuggetContent, feedback.url, feedback.originalType),
         )
@@ -140,77 +142,35 @@ class FeedbackService:
 
         if existing:
             # Found existing record - need to determine if it's duplicate or update
-            existing_id, current_count, first_reported = existing
-
-            # Get existing values for comparison
-            comparison_cursor = await db.execute(
-                """
-                SELECT rating, corrected_type, context
-                FROM nugget_feedback
-                WHERE id = ?
-                """,
-                (existing_id,),
+            existing_id, existing_rating, existing_corrected_type, existing_context = (
+                existing
             )
-            existing_values = await comparison_cursor.fetchone()
 
-            if existing_values:
-                existing_rating, existing_corrected_type, existing_context = (
-                    existing_values
-                )
+            # Compare with new feedback to determine if it's truly identical
+            is_identical = self._compare_nugget_feedback(
+                feedback, existing_rating, existing_corrected_type, existing_context
+            )
 
-                # Compare with new feedback to determine if it's truly identical
-                is_identical = self._compare_nugget_feedback(
-                    feedback, existing_rating, existing_corrected_type, existing_context
+            if is_identical:
+                # True duplicate - just increment report count
+                await db.execute(
+                    """
+                    UPDATE nugget_feedback
+                    SET report_count = report_count + 1,
+                        last_reported_at = ?
+                    WHERE id = ?
+                    """,
+                    (current_time, existing_id),
                 )
-
-                if is_identical:
-                    # True duplicate - just increment report count
-                    await db.execute(
-                        """
-                        UPDATE nugget_feedback
-                        SET report_count = ?,
-                            last_reported_at = ?
-                        WHERE id = ?
-                        """,
-                        (current_count + 1, current_time, existing_id),
-                    )
-                    feedback.id = existing_id
-                    await db.commit()
-                    return "duplicate"
-                else:
-                    # Update - increment count and update fields
-                    await db.execute(
-                        """
-                        UPDATE nugget_feedback
-                        SET report_count = ?,
-                            last_reported_at = ?,
-                            context = ?,
-                            corrected_type = ?,
-                            rating = ?,
-                            model_provider = ?,
-                            model_name = ?
-                        WHERE id = ?
-                        """,
-                        (
-                            current_count + 1,
-                            current_time,
-                            feedback.context,
-                            feedback.correctedType,
-                            feedback.rating,
-                            feedback.modelProvider,  # NEW
-                            feedback.modelName,  # NEW
-                            existing_id,
-                        ),
-                    )
-                    feedback.id = existing_id
-                    await db.commit()
-                    return "updated"
+                feedback.id = existing_id
+                await db.commit()
+                return "duplicate"
             else:
-                # This shouldn't happen, but fallback to update behavior
+                # Update - increment count and update fields
                 await db.execute(
                     """
                     UPDATE nugget_feedback
-                    SET report_count = ?,
+                    SET report_count = report_count + 1,
                         last_reported_at = ?,
                         context = ?,
                         corrected_type = ?,
@@ -220,7 +180,6 @@ class FeedbackService:
                     WHERE id = ?
                     """,
                     (
-                        current_count + 1,
                         current_time,
                         feedback.context,
                         feedback.correctedType,
@@ -271,12 +230,14 @@ class FeedbackService:
         """Store missing content feedback in database with smart deduplication"""
         current_time = datetime.now(timezone.utc)
 
-        # Check for existing record with same content and URL
+        # Check for existing record with same content and URL, fetching the
+        # fields to compare in the same query
         cursor = await db.execute(
             """
-            SELECT id, report_count, first_reported_at
+            SELECT id, suggested_type, context
             FROM missing_content_feedback
             WHERE content = ? AND url = ?
+            LIMIT 1
             """,
             (feedback.content, feedback.url),
         )
@@ -284,73 +245,33 @@ class FeedbackService:
 
         if existing:
             # Found existing record - need to determine if it's duplicate or update
-            existing_id, current_count, first_reported = existing
+            existing_id, existing_suggested_type, existing_context = existing
 
-            # Get existing values for comparison
-            comparison_cursor = await db.execute(
-                """
-                SELECT suggested_type, context
-                FROM missing_content_feedback
-                WHERE id = ?
-                """,
-                (existing_id,),
+            # Compare with new feedback to determine if it's truly identical
+            is_identical = self._compare_missing_content_feedback(
+                feedback, existing_suggested_type, existing_context
             )
-            existing_values = await comparison_cursor.fetchone()
-
-            if existing_values:
-                existing_suggested_type, existing_context = existing_values
 
-                # Compare with new feedback to determine if it's truly identical
-                is_identical = self._compare_missing_content_feedback(
-                    feedback, existing_suggested_type, existing_context
+            if is_identical:
+                # True duplicate - just increment report count
+                await db.execute(
+                    """
+                    UPDATE missing_content_feedback
+                    SET report_count = report_count + 1,
+                        last_reported_at = ?
+                    WHERE id = ?
+                    """,
+                    (current_time, existing_id),
                 )
-
-                if is_identical:
-                    # True duplicate - just increment report count
-                    await db.execute(
-                        """
-                        UPDATE missing_content_feedback
-                        SET report_count = ?,
-                            last_reported_at = ?
-                        WHERE id = ?
-                        """,
-                        (current_count + 1, current_time, existing_id),
-                    )
-                    feedback.id = existing_id
-                    await db.commit()
-                    return "duplicate"
-                else:
-                    # Update - increment count and update fields
-                    await db.execute(
-                        """
-                        UPDATE missing_content_feedback
-                        SET report_count = ?,
-                            last_reported_at = ?,
-                            context = ?,
-                            suggested_type = ?,
-                            model_provider = ?,
-                            model_name = ?
-                        WHERE id = ?
-                        """,
-                        (
-                            current_count + 1,
-                            current_time,
-                            feedback.context,
-                            feedback.suggestedType,
-                            feedback.modelProvider,  # NEW
-                            feedback.modelName,  # NEW
-                            existing_id,
-                        ),
-                    )
-                    feedback.id = existing_id
-                    await db.commit()
-                    return "updated"
+                feedback.id = existing_id
+                await db.commit()
+                return "duplicate"
             else:
-                # This shouldn't happen, but fallback to update behavior
+                # Update - increment count and update fields
                 await db.execute(
                     """
                     UPDATE missing_content_feedback
-                    SET report_count = ?,
+                    SET report_count = report_count + 1,
                         last_reported_at = ?,
                         context = ?,
                         suggested_type = ?,
@@ -359,7 +280,6 @@ class FeedbackService:
                     WHERE id = ?
                     """,
                     (
-                        current_count + 1,
                         current_time,
                         feedback.context,
                         feedback.suggestedType,
@@ -16,6 +16,14 @@ import aiosqlite
 class ImprovedCostTrackingService:
     """Service for tracking optimization costs using DSPy's built-in cost tracking"""
 
+    # Single shared SQL text for the per-operation and batched inserts
+    _INSERT_COST_SQL = """
+        INSERT INTO cost_tracking (
+            id, optimization_run_id, operation_type, model_name,
+            input_tokens, output_tokens, cost_usd, created_at, metadata
+        ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+    """
+
     async def track_dspy_operation_cost(
         self,
         db: aiosqlite.Connection,
@@ -24,6 +32,7 @@ class ImprovedCostTrackingService:
         operation_type: str,
         operation_name: str = "DSPy Operation",
         metadata: Optional[dict] = None,
+        start_index: Optional[int] = None,
     ) -> dict:
         """
         Track the cost of a DSPy operation using built-in cost tracking.
@@ -35,19 +44,105 @@ class ImprovedCostTrackingService:
             operation_type: Type of operation ('prompt_generation', 'optimization', 'evaluation')
             operation_name: Descriptive name for the operation
             metadata: Additional operation-specific data
+            start_index: len(lm.history) taken before the operation started.
+                Only entries from this index on are counted and the history is
+                left intact. When omitted, the whole history is counted and
+                then cleared.
 
         Returns:
             Dictionary with cost tracking details
         """
+        # Only look at the calls made by this operation
+        entries = lm.history if start_index is None else lm.history[start_index:]
+
+        row, cost_breakdown = self._build_cost_entry(
+            entries, optimization_run_id, operation_type, operation_name, metadata
+        )
+
+        # Store in database for historical tracking
+        await db.execute(self._INSERT_COST_SQL, row)
+        await db.commit()
+
+        # Update the optimization run's total costs
+        await self._update_run_totals(db, optimization_run_id)
+
+        # Without a snapshot, clear history to prepare for next operation
+        if start_index is None:
+            lm.history.clear()
+
+        return cost_breakdown
+
+    async def track_dspy_operations_cost(
+        self,
+        db: aiosqlite.Connection,
+        lm,  # DSPy language model with history
+        optimization_run_id: str,
+        operations: list[dict],
+    ) -> list[dict]:
+        """
+        Track several DSPy operations of one run in a single transaction.
+
+        Args:
+            db: Database connection
+            lm: DSPy language model with history
+            optimization_run_id: ID of the optimization run
+            operations: One dict per operation with 'operation_type' and
+                optional 'operation_name', 'metadata', 'start_index' and
+                'end_index' delimiting its slice of lm.history
+
+        Returns:
+            List of cost breakdowns, in the order of operations
+        """
+        if not operations:
+            return []
+
+        rows = []
+        breakdowns = []
+        for operation in operations:
+            entries = lm.history[
+                operation.get("start_index", 0) : operation.get("end_index")
+            ]
+            row, cost_breakdown = self._build_cost_entry(
+                entries,
+                optimization_run_id,
+                operation["operation_type"],
+                operation.get("operation_name", "DSPy Operation"),
+                operation.get("metadata"),
+            )
+            rows.append(row)
+            breakdowns.append(cost_breakdown)
+
+        # One transaction for all inserts and the run totals update. Roll back
+        # on failure so the connection isn't left inside an open transaction.
+        await db.execute("BEGIN IMMEDIATE")
+        try:
+            await db.executemany(self._INSERT_COST_SQL, rows)
+            await self._update_run_totals(db, optimization_run_id)
+            await db.commit()
+        except Exception:
+            await db.rollback()
+            raise
+
+        return breakdowns
+
+    def _build_cost_entry(
+        self,
+        entries: list,
+        optimization_run_id: str,
+        operation_type: str,
+        operation_name: str,
+        metadata: Optional[dict],
+    ) -> tuple[tuple, dict]:
+        """Build the cost_tracking row and caller breakdown for history entries"""
         # Get accurate costs from DSPy history
-        operation_cost = sum([x["cost"] for x in lm.history if x["cost"] is not None])
+        operation_cost = sum(x["cost"] for x in entries if x.get("cost") is not None)
 
         # Get token usage details (with fallback for different DSPy versions)
         total_tokens = 0
         input_tokens = 0
         output_tokens = 0
 
-        for entry in lm.history:
+        for entry in entries:
             if entry.get("usage"):
                 usage = entry["usage"]
                 # Try different possible field names for token counts
@@ -62,46 +157,33 @@ class ImprovedCostTrackingService:
                     or usage.get("output_tokens", 0)
                     or usage.get("completion", 0)
                 )
-        api_calls = len(lm.history)
+        api_calls = len(entries)
 
         # Get model information (from first history entry)
-        model_name = lm.history[0]["response_model"] if lm.history else "unknown"
+        model_name = entries[0]["response_model"] if entries else "unknown"
 
         cost_id = str(uuid.uuid4())
 
-        # Store in database for historical tracking
-        await db.execute(
-            """
-            INSERT INTO cost_tracking (
-                id, optimization_run_id, operation_type, model_name,
-                input_tokens, output_tokens, cost_usd, timestamp, metadata
-            ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
-            """,
-            (
-                cost_id,
-                optimization_run_id,
-                operation_type,
-                model_name,
-                input_tokens,
-                output_tokens,
-                operation_cost,
-                datetime.now(timezone.utc).isoformat(),
-                json.dumps(
-                    {
-                        **(metadata or {}),
-                        "operation_name": operation_name,
-                        "api_calls": api_calls,
-                        "total_tokens": total_tokens,
-                        "cost_source": "dspy_builtin",
-                        "accurate": True,
-                    }
-                ),
+        row = (
+            cost_id,
+            optimization_run_id,
+            operation_type,
+            model_name,
+            input_tokens,
+            output_tokens,
+            operation_cost,
+            datetime.now(timezone.utc).isoformat(),
+            json.dumps(
+                {
+                    **(metadata or {}),
+                    "operation_name": operation_name,
+                    "api_calls": api_calls,
+                    "total_tokens": total_tokens,
+                    "cost_source": "dspy_builtin",
+                    "accurate": True,
+                }
             ),
         )
-        await db.commit()
-
-        # Update the optimization run's total costs
-        await self._update_run_totals(db, optimization_run_id)
 
         # Create detailed breakdown for caller
         cost_breakdown = {
@@ -114,13 +196,10 @@ class ImprovedCostTrackingService:
             "model_name": model_name,
             "cost_per_token": operation_cost / max(total_tokens, 1),
             "cost_per_call": operation_cost / max(api_calls, 1),
-            "history_entries": len(lm.history),
+            "history_entries": len(entries),
         }
 
-        # Clear history to prepare for next operation
-        lm.history.clear()
-
-        return cost_breakdown
+        return row, cost_breakdown
 
     async def get_run_costs(
         self, db: aiosqlite.Connection, optimization_run_id: str
@@ -145,10 +224,10 @@ class ImprovedCostTrackingService:
         cursor = await db.execute(
             """
             SELECT operation_type, model_name, input_tokens,
-                   output_tokens, cost_usd, timestamp, metadata
+                   output_tokens, cost_usd, created_at, metadata
             FROM cost_tracking
             WHERE optimization_run_id = ?
-            ORDER BY timestamp ASC
+            ORDER BY created_at ASC
             """,
             (optimization_run_id,),
         )
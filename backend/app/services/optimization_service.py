@@ -31,6 +31,10 @@ from .feedback_service import FeedbackService
 if TYPE_CHECKING:
     from ..models import ChromeExtensionPrompt
 
+# Number of log records buffered before the production log file is written
+PROGRESS_LOG_BATCH_SIZE = 8
+
+
 # Configure environment-aware structured logging
 def _setup_logger():
     """Setup environment-aware logging configuration"""
@@ -52,13 +56,21 @@ def _setup_logger():
 
     # Only add file handler in production
     if os.getenv("ENVIRONMENT") == "production":
-        from logging.handlers import RotatingFileHandler
+        from logging.handlers import MemoryHandler, RotatingFileHandler
 
         file_handler = RotatingFileHandler(
             "optimization.log", maxBytes=10485760, backupCount=5
         )
         file_handler.setFormatter(formatter)
-        logger.addHandler(file_handler)
+        # Batch file writes: records are flushed every PROGRESS_LOG_BATCH_SIZE
+        # entries, on errors, when a run finishes and at interpreter exit
+        logger.addHandler(
+            MemoryHandler(
+                PROGRESS_LOG_BATCH_SIZE,
+                flushLevel=logging.ERROR,
+                target=file_handler,
+            )
+        )
 
     logger.setLevel(logging.INFO)
     return logger
@@ -647,16 +659,29 @@ Return valid JSON with the exact structure: {{"golden_nuggets": [...]}}"""
         await db.commit()
         return prompt_id
 
-    def _log_progress(self, run_id: str, step: str, progress: int, message: str):
-        """Log optimization progress to memory and console"""
+    def _log_progress(
+        self,
+        run_id: str,
+        step: str,
+        progress: int,
+        message: str,
+        now: Optional[datetime] = None,
+    ):
+        """Log optimization progress to memory and console
+
+        now overrides the current UTC time, letting callers replay progress
+        on a virtual clock.
+        """
         try:
+            now = now or datetime.now(timezone.utc)
+
             # Update in-memory progress
             self.active_runs[run_id] = {
                 "step": step,
                 "progress": progress,
                 "message": message,
-                "timestamp": datetime.now(timezone.utc).isoformat(),
-                "last_updated": datetime.now(timezone.utc),
+                "timestamp": now.isoformat(),
+                "last_updated": now,
             }
 
             # Console logging with emoji indicators
@@ -665,6 +690,9 @@ Return valid JSON with the exact structure: {{"golden_nuggets": [...]}}"""
                     f"✅ {message}",
                     extra={"run_id": run_id, "step": step, "progress": progress},
                 )
+                # Write out the run's buffered records now that it is done
+                for handler in logger.handlers:
+                    handler.flush()
             elif progress == -1:
                 logger.error(
                     f"❌ {message}",
@@ -0,0 +1,21 @@
+-- Golden Nuggets Finder - Covering Index for Dashboard Cost Sums
+-- Created: 2026-10-17
+-- Description: dashboard_stats keeps computing its status counts directly;
+--              each COUNT(*) filter (processed, status, is_active, is_current)
+--              already has its own index. The 30-day cost and token sums
+--              filter optimization_runs on started_at and read api_cost and
+--              total_tokens, so index those columns behind started_at and the
+--              sums are answered from the index alone.
+
+PRAGMA foreign_keys = ON;
+
+-- =============================================================================
+-- INDEXES
+-- =============================================================================
+
+CREATE INDEX idx_optimization_runs_started_cost ON optimization_runs(
+    started_at, api_cost, total_tokens
+);
+
+-- Lookups and ordering by started_at alone use the leading column of the new index
+DROP INDEX idx_optimization_runs_started_at;
@@ -0,0 +1,72 @@
+-- Golden Nuggets Finder - Denormalize Recent Feedback Sort Key
+-- Created: 2026-10-17
+-- Description: recent_feedback_with_status sorted both feedback tables by
+--              COALESCE(last_reported_at, created_at), an expression no index
+--              covers (and one SQLite rejects as an ORDER BY term of a
+--              compound SELECT). Keep that value on each feedback row as
+--              last_activity_at, index it, and sort the view by the column so
+--              the "recent" panel becomes two ordered index scans merged.
+
+PRAGMA foreign_keys = ON;
+
+-- =============================================================================
+-- DENORMALIZED SORT KEY
+-- =============================================================================
+
+-- Generated columns stay correct on every insert and on deduplication updates
+-- of last_reported_at without any application changes
+ALTER TABLE nugget_feedback ADD COLUMN last_activity_at TIMESTAMP
+    GENERATED ALWAYS AS (COALESCE(last_reported_at, created_at)) VIRTUAL;
+
+ALTER TABLE missing_content_feedback ADD COLUMN last_activity_at TIMESTAMP
+    GENERATED ALWAYS AS (COALESCE(last_reported_at, created_at)) VIRTUAL;
+
+CREATE INDEX idx_nugget_feedback_last_activity ON nugget_feedback(last_activity_at);
+CREATE INDEX idx_missing_content_last_activity ON missing_content_feedback(last_activity_at);
+
+-- =============================================================================
+-- UPDATED VIEWS
+-- =============================================================================
+
+-- Same leading columns as before, with the sort key appended
+DROP VIEW recent_feedback_with_status;
+
+CREATE VIEW recent_feedback_with_status AS
+SELECT
+    'nugget' as feedback_type,
+    id,
+    nugget_content as content,
+    rating,
+    url,
+    processed,
+    last_used_at,
+    usage_count,
+    report_count,
+    first_reported_at,
+    last_reported_at,
+    created_at,
+    client_timestamp,
+    model_provider,
+    model_name,
+    last_activity_at
+FROM nugget_feedback
+UNION ALL
+SELECT
+    'missing_content' as feedback_type,
+    id,
+    content,
+    NULL as rating,  -- Missing content doesn't have ratings
+    url,
+    processed,
+    last_used_at,
+    usage_count,
+    report_count,
+    first_reported_at,
+    last_reported_at,
+    created_at,
+    client_timestamp,
+    model_provider,
+    model_name,
+    last_activity_at
+FROM missing_content_feedback
+ORDER BY last_activity_at DESC;
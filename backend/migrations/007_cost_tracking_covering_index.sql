@@ -0,0 +1,19 @@
+-- Golden Nuggets Finder - Covering Index for Run Cost Totals
+-- Created: 2026-10-17
+-- Description: Rolling cost_tracking up into optimization_runs (after every
+--              tracked operation) sums cost_usd, input_tokens and output_tokens
+--              for one run. Index those columns behind the run id so the sums
+--              are answered from the index alone, without visiting table rows.
+
+PRAGMA foreign_keys = ON;
+
+-- =============================================================================
+-- INDEXES
+-- =============================================================================
+
+CREATE INDEX idx_cost_tracking_run_operation ON cost_tracking(
+    optimization_run_id, operation_type, cost_usd, input_tokens, output_tokens
+);
+
+-- Lookups by run id alone use the leading column of the new index
+DROP INDEX idx_cost_tracking_run_id;
@@ -57,6 +57,11 @@ def main():
             {
                 "workers": args.workers,
                 "reload": False,
+                # Pin the uvicorn[standard] fast paths (uvloop event loop,
+                # httptools parser) so a broken install fails at startup
+                # instead of silently falling back to asyncio/h11
+                "loop": "uvloop",
+                "http": "httptools",
                 "access_log": True,
                 "log_config": {
                     "version": 1,
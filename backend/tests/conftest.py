@@ -12,20 +12,27 @@ Test Structure:
 """
 
 import asyncio
-import contextlib
+from contextlib import closing
+import importlib.util
 import os
 import shutil
+import sqlite3
 import tempfile
 
+from fastapi.testclient import TestClient
 import pytest
 import pytest_asyncio
 
 from app.database import (
     get_test_database_path,
+    get_test_temp_dir_prefix,
     init_database,
     is_test_environment,
     reset_database_for_test,
 )
+from app.main import app
+from app.services.dspy_config import validate_dspy_environment
+from app.services.optimization_service import OptimizationService
 
 
 @pytest.fixture(scope="session", autouse=True)
@@ -39,26 +46,53 @@ def verify_test_environment():
 
 
 @pytest.fixture(scope="session")
-def event_loop():
-    """Create an instance of the default event loop for the test session."""
-    loop = asyncio.get_event_loop_policy().new_event_loop()
-    yield loop
-    loop.close()
+def event_loop_policy():
+    """Event loop policy for the session-scoped loop shared by all async tests.
+
+    Uses uvloop (installed with uvicorn[standard], as in production) when it is
+    available and falls back to the default asyncio loop otherwise.
+    """
+    if importlib.util.find_spec("uvloop") is not None:
+        import uvloop
+
+        return uvloop.EventLoopPolicy()
+    return asyncio.DefaultEventLoopPolicy()
+
+
+@pytest_asyncio.fixture(scope="session")
+async def migrated_database_template():
+    """
+    Run the migrations once per session and return the resulting database.
+
+    clean_database copies this file instead of migrating every test's
+    database from scratch. The session cleanup removes its directory.
+    """
+    reset_database_for_test()
+    await init_database()
+    return get_test_database_path()
+
+
+def _copy_migrated_database(template_path):
+    """Point the app at a new temp database holding a copy of the template"""
+    reset_database_for_test()
+
+    # SQLite's backup API copies safely even with WAL journaling
+    with closing(sqlite3.connect(template_path)) as template:
+        with closing(sqlite3.connect(get_test_database_path())) as fresh:
+            template.backup(fresh)
 
 
 @pytest_asyncio.fixture
-async def clean_database():
+async def clean_database(migrated_database_template):
     """
     Provide a clean database for each test.
 
     Creates a fresh database before each test and cleans up after.
     This ensures complete test isolation.
     """
-    # Create a fresh database path for this test
-    reset_database_for_test()
-
-    # Initialize the database with fresh schema
-    await init_database()
+    # Create a fresh database path for this test, initialized with the schema
+    # copied from the migrated template
+    _copy_migrated_database(migrated_database_template)
 
     # Yield control to the test
     yield
@@ -81,31 +115,40 @@ async def clean_database():
                 pass  # Directory might already be deleted
 
 
-@pytest_asyncio.fixture
-async def setup_database():
+@pytest.fixture(scope="module")
+def client(migrated_database_template):
     """
-    Legacy fixture name for backward compatibility.
-
-    Uses clean_database under the hood for proper isolation.
+    One TestClient per module.
+
+    Entering it as a context manager runs the app's startup handlers and
+    starts the request portal once, instead of setting them up per test.
+    Startup runs init_database() against the current DATABASE_PATH, so it
+    is first pointed at a fresh copy of the migrated template rather than
+    whatever path an earlier test left behind. Tests that need their own
+    database still request clean_database.
     """
-    # Create a fresh database path for this test
-    reset_database_for_test()
+    _copy_migrated_database(migrated_database_template)
+    with TestClient(app) as test_client:
+        yield test_client
 
-    # Initialize the database
-    await init_database()
 
-    yield
+@pytest.fixture(scope="session")
+def optimization_service():
+    """
+    Share one OptimizationService across the session.
 
-    # Cleanup
-    db_path = get_test_database_path()
-    if os.path.exists(db_path):
-        with contextlib.suppress(OSError):
-            os.remove(db_path)
+    Each instance starts its own ThreadPoolExecutor, so tests reuse this one
+    and the executor is shut down when the session ends.
+    """
+    service = OptimizationService()
+    yield service
+    service.executor.shutdown(wait=False)
 
-        temp_dir = os.path.dirname(db_path)
-        if os.path.exists(temp_dir) and temp_dir.startswith(tempfile.gettempdir()):
-            with contextlib.suppress(OSError):
-                shutil.rmtree(temp_dir)
+
+@pytest.fixture(scope="session")
+def dspy_env_status():
+    """DSPy environment status, validated once per session"""
+    return validate_dspy_environment()
 
 
 # Session-level cleanup
@@ -114,10 +157,12 @@ def cleanup_test_files():
     """Clean up any remaining test files at the end of the session"""
     yield
 
-    # Clean up any remaining test directories
+    # Clean up any remaining test directories. Under pytest-xdist only this
+    # worker's are removed; the other workers may still be using theirs.
     temp_base = tempfile.gettempdir()
+    prefix = get_test_temp_dir_prefix()
     for item in os.listdir(temp_base):
-        if item.startswith("golden_nuggets_test_"):
+        if item.startswith(prefix):
             test_dir = os.path.join(temp_base, item)
             try:
                 shutil.rmtree(test_dir)
@@ -5,9 +5,11 @@ Tests how the FastAPI endpoints handle various error conditions
 and return appropriate HTTP status codes and error messages.
 """
 
+import time
 from unittest.mock import patch
 
 from fastapi.testclient import TestClient
+import pytest
 
 from app.main import app
 
@@ -338,6 +340,7 @@ class TestFeedbackCRUDErrorHandling:
 class TestMonitoringAPIErrorHandling:
     """Test error handling in monitoring API endpoints"""
 
+    @patch.dict("app.main._health_db_probe", {"checked_at": 0.0})
     @patch("app.main.get_db")
     def test_health_check_database_unavailable(self, mock_get_db, clean_database):
         """Test health check when database is unavailable"""
@@ -356,6 +359,17 @@ class TestMonitoringAPIErrorHandling:
         assert health_data["status"] == "unhealthy"
         assert not health_data["database_accessible"]
 
+    @pytest.mark.usefixtures("clean_database")
+    @patch("app.main.get_db")
+    def test_health_check_reuses_recent_database_probe(self, mock_get_db):
+        """Test that a recent successful probe is reused without a new query"""
+        with patch.dict("app.main._health_db_probe", {"checked_at": time.monotonic()}):
+            response = client.get("/monitor/health")
+
+        assert response.status_code == 200
+        assert response.json()["database_accessible"]
+        mock_get_db.assert_not_called()
+
     def test_optimization_status_not_found(self, clean_database):
         """Test getting optimization status for non-existent run"""
         response = client.get("/monitor/status/non-existent-run-id")
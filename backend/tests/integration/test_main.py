@@ -6,22 +6,15 @@ Tests the complete request/response cycle including database operations.
 
 import uuid
 
-from fastapi.testclient import TestClient
 
-from app.main import app
-
-# Create test client for FastAPI app
-client = TestClient(app)
-
-
-def test_health_check():
+def test_health_check(client):
     """Test the health check endpoint"""
     response = client.get("/")
     assert response.status_code == 200
     assert "Golden Nuggets Feedback API" in response.json()["message"]
 
 
-def test_feedback_stats_endpoint(clean_database):
+def test_feedback_stats_endpoint(client, clean_database):
     """Test getting feedback stats"""
     response = client.get("/feedback/stats")
     assert response.status_code == 200
@@ -35,13 +28,13 @@ def test_feedback_stats_endpoint(clean_database):
     assert "nextOptimizationTrigger" in data
 
 
-def test_feedback_submission_empty(clean_database):
+def test_feedback_submission_empty(client, clean_database):
     """Test submitting empty feedback"""
     response = client.post("/feedback", json={})
     assert response.status_code == 200
 
 
-def test_feedback_submission_valid(clean_database):
+def test_feedback_submission_valid(client, clean_database):
     """Test submitting valid feedback"""
     feedback_data = {
         "nuggetFeedback": [
@@ -78,7 +71,7 @@ def test_feedback_submission_valid(clean_database):
     assert data["success"] is True
 
 
-def test_optimization_trigger(clean_database):
+def test_optimization_trigger(client, clean_database):
     """Test manual optimization trigger"""
     optimization_request = {"mode": "cheap", "manualTrigger": True}
 
@@ -89,7 +82,7 @@ def test_optimization_trigger(clean_database):
     assert "Optimization started" in data["message"]
 
 
-def test_optimization_history(clean_database):
+def test_optimization_history(client, clean_database):
     """Test getting optimization history"""
     response = client.get("/optimization/history")
     assert response.status_code == 200
@@ -101,7 +94,7 @@ def test_optimization_history(clean_database):
     assert "has_more" in data
 
 
-def test_current_prompt(clean_database):
+def test_current_prompt(client, clean_database):
     """Test getting current optimized prompt"""
     response = client.get("/optimize/current")
     assert response.status_code == 200
@@ -113,7 +106,7 @@ def test_current_prompt(clean_database):
     assert "prompt" in data
 
 
-def test_current_prompt_with_provider_and_model_parameters(clean_database):
+def test_current_prompt_with_provider_and_model_parameters(client, clean_database):
     """Test getting current optimized prompt with provider and model query parameters"""
     # Test provider+model specific request
     response = client.get("/optimize/current?provider=openai&model=gpt-4o-mini")
@@ -136,7 +129,7 @@ def test_current_prompt_with_provider_and_model_parameters(clean_database):
         assert isinstance(data["modelName"], str)
 
 
-def test_current_prompt_with_only_provider_parameter(clean_database):
+def test_current_prompt_with_only_provider_parameter(client, clean_database):
     """Test that providing only provider parameter still works (model defaults)"""
     response = client.get("/optimize/current?provider=gemini")
     assert response.status_code == 200
@@ -148,7 +141,7 @@ def test_current_prompt_with_only_provider_parameter(clean_database):
     assert "prompt" in data
 
 
-def test_current_prompt_with_only_model_parameter(clean_database):
+def test_current_prompt_with_only_model_parameter(client, clean_database):
     """Test that providing only model parameter still works (provider defaults)"""
     response = client.get("/optimize/current?model=claude-3-5-sonnet-20241022")
     assert response.status_code == 200
@@ -160,7 +153,7 @@ def test_current_prompt_with_only_model_parameter(clean_database):
     assert "prompt" in data
 
 
-def test_current_prompt_with_invalid_provider(clean_database):
+def test_current_prompt_with_invalid_provider(client, clean_database):
     """Test that invalid provider parameter is handled gracefully"""
     response = client.get(
         "/optimize/current?provider=invalid_provider&model=some-model"
@@ -174,7 +167,7 @@ def test_current_prompt_with_invalid_provider(clean_database):
     assert "prompt" in data
 
 
-def test_current_prompt_with_empty_parameters(clean_database):
+def test_current_prompt_with_empty_parameters(client, clean_database):
     """Test that empty parameter values are handled gracefully"""
     response = client.get("/optimize/current?provider=&model=")
     assert response.status_code == 200
@@ -186,7 +179,7 @@ def test_current_prompt_with_empty_parameters(clean_database):
     assert "prompt" in data
 
 
-def test_current_prompt_backward_compatibility(clean_database):
+def test_current_prompt_backward_compatibility(client, clean_database):
     """Test that the endpoint maintains backward compatibility (no parameters)"""
     # This should behave exactly like the original endpoint
     response_without_params = client.get("/optimize/current")
@@ -207,7 +200,7 @@ def test_current_prompt_backward_compatibility(clean_database):
     assert "prompt" in data_with_empty
 
 
-def test_current_prompt_with_special_characters_in_parameters(clean_database):
+def test_current_prompt_with_special_characters_in_parameters(client, clean_database):
     """Test that special characters in parameters are handled gracefully"""
     # Test with URL encoding and special characters
     response = client.get(
@@ -222,7 +215,7 @@ def test_current_prompt_with_special_characters_in_parameters(clean_database):
     assert "prompt" in data
 
 
-def test_current_prompt_response_structure_consistency(clean_database):
+def test_current_prompt_response_structure_consistency(client, clean_database):
     """Test that response structure is consistent across different parameter combinations"""
     # Test multiple parameter combinations
     test_cases = [
@@ -256,7 +249,7 @@ def test_current_prompt_response_structure_consistency(clean_database):
         assert len(response_data["prompt"]) > 0  # Should not be empty
 
 
-def test_update_feedback_item(clean_database):
+def test_update_feedback_item(client, clean_database):
     """Test updating a feedback item"""
     # Use unique ID for each test run
     test_id = f"update-test-{uuid.uuid4()}"
@@ -298,7 +291,7 @@ def test_update_feedback_item(clean_database):
     assert "rating" in data["updated_fields"]
 
 
-def test_update_feedback_item_not_found(clean_database):
+def test_update_feedback_item_not_found(client, clean_database):
     """Test updating a non-existent feedback item"""
     update_data = {"content": "This should fail", "rating": "positive"}
 
@@ -309,7 +302,7 @@ def test_update_feedback_item_not_found(clean_database):
     assert "not found" in response.json()["detail"].lower()
 
 
-def test_update_feedback_item_empty_update(clean_database):
+def test_update_feedback_item_empty_update(client, clean_database):
     """Test updating feedback item with no fields"""
     update_data = {}
 
@@ -318,7 +311,7 @@ def test_update_feedback_item_empty_update(clean_database):
     assert "At least one field must be provided" in response.json()["detail"]
 
 
-def test_delete_feedback_item(clean_database):
+def test_delete_feedback_item(client, clean_database):
     """Test deleting a feedback item"""
     # Use unique ID for each test run
     test_id = f"delete-test-{uuid.uuid4()}"
@@ -355,14 +348,14 @@ def test_delete_feedback_item(clean_database):
     assert response.status_code == 404
 
 
-def test_delete_feedback_item_not_found(clean_database):
+def test_delete_feedback_item_not_found(client, clean_database):
     """Test deleting a non-existent feedback item"""
     response = client.delete("/feedback/non-existent-id?feedback_type=nugget")
     assert response.status_code == 404
     assert "not found" in response.json()["detail"].lower()
 
 
-def test_feedback_update_scenario(clean_database):
+def test_feedback_update_scenario(client, clean_database):
     """Test the main user scenario: thumbs up → type correction"""
     # Use unique ID for this test
     test_id = f"update-scenario-{uuid.uuid4()}"
@@ -431,7 +424,7 @@ def test_feedback_update_scenario(clean_database):
     assert "Thank you for the correction" in dedup["user_message"]
 
 
-def test_feedback_rating_change_scenario(clean_database):
+def test_feedback_rating_change_scenario(client, clean_database):
     """Test user changing rating from positive to negative"""
     test_id = f"rating-change-{uuid.uuid4()}"
 
@@ -485,7 +478,7 @@ def test_feedback_rating_change_scenario(clean_database):
     assert "updated with the new information" in dedup["user_message"]
 
 
-def test_mixed_update_duplicate_scenario(clean_database):
+def test_mixed_update_duplicate_scenario(client, clean_database):
     """Test batch submission with mix of updates, duplicates, and new items"""
     # Step 1: Submit ONE nugget
     original_data = {
@@ -535,7 +528,7 @@ def test_mixed_update_duplicate_scenario(clean_database):
     assert response.json()["deduplication"]["nugget_updates"] == 1
 
 
-def test_api_response_messages(clean_database):
+def test_api_response_messages(client, clean_database):
     """Test that API returns correct user messages for different scenarios"""
     base_id = f"messages-{uuid.uuid4()}"
 
@@ -7,389 +7,453 @@ advanced engineering features.
 """
 
 import asyncio
+import functools
+import inspect
 import json
-import logging
-from unittest.mock import AsyncMock, patch
+import sys
+import types
+from unittest.mock import AsyncMock
 
 import pytest
 
-from app.services.optimization_service import OptimizationService
+# Feedback rows with provider information, serialized once at import so the
+# per-test mock database only hands out the prebuilt tuples
+_PROVIDER_FEEDBACK_ROWS = (
+    (
+        "feedback_gemini_1",
+        json.dumps(
+            {
+                "content": "Technical article about async programming",
+                "analysis": {
+                    "golden_nuggets": [
+                        {
+                            "type": "aha! moments",
+                            "content": "The key insight about async/await is that it's syntactic sugar over Promises, making asynchronous code readable while avoiding callback hell.",
+                            "startContent": "The key insight about async/await",
+                            "endContent": "avoiding callback hell",
+                        }
+                    ]
+                },
+                "provider": "gemini",
+                "model": "gemini-2.5-flash",
+            }
+        ),
+        5,  # rating
+        "2024-01-01T00:00:00Z",
+    ),
+    (
+        "feedback_openai_1",
+        json.dumps(
+            {
+                "content": "Productivity tools comparison article",
+                "analysis": {
+                    "golden_nuggets": [
+                        {
+                            "type": "tool",
+                            "content": "I use Notion's database templates with rollup properties to automatically track project progress across multiple workspaces, which eliminates manual status updates.",
+                            "startContent": "I use Notion's database templates",
+                            "endContent": "manual status updates",
+                        }
+                    ]
+                },
+                "provider": "openai",
+                "model": "gpt-4",
+            }
+        ),
+        4,  # rating
+        "2024-01-02T00:00:00Z",
+    ),
+    (
+        "feedback_anthropic_1",
+        json.dumps(
+            {
+                "content": "Mental models for decision making",
+                "analysis": {
+                    "golden_nuggets": [
+                        {
+                            "type": "model",
+                            "content": "The 'Inversion' mental model works by asking 'What would guarantee failure?' before starting a project, helping identify risks proactively instead of just planning for success.",
+                            "startContent": "The 'Inversion' mental model works",
+                            "endContent": "planning for success",
+                        }
+                    ]
+                },
+                "provider": "anthropic",
+                "model": "claude-3-sonnet",
+            }
+        ),
+        5,  # rating
+        "2024-01-03T00:00:00Z",
+    ),
+)
 
 
-class TestProviderSpecificOptimization:
-    """Test provider-specific optimization with Chrome extension prompts"""
+@functools.lru_cache(maxsize=32)
+def _cached_mock_prompt(provider_id: str, model_name: str) -> dict:
+    return {
+        "id": f"prompt_{provider_id}_{model_name.replace('/', '_')}",
+        "version": 3,
+        "prompt": f"## ROLE & GOAL:\nOptimized for {provider_id} {model_name} with high quality standards approach...",
+        "optimizationDate": "2024-01-12T00:00:00Z",
+        "performance": {"feedbackCount": 35, "positiveRate": 0.89},
+        "providerSpecific": True,
+        "modelProvider": provider_id,
+        "modelName": model_name,
+    }
 
-    @pytest.fixture
-    def providers(self):
-        """List of supported AI providers"""
-        return ["gemini", "openai", "anthropic", "openrouter"]
 
-    @pytest.fixture
-    async def optimization_service(self):
-        """Create optimization service for testing"""
-        return OptimizationService()
+def _make_mock_prompt(provider_id: str, model_name: str = "model-name"):
+    """Return a read-only optimized prompt payload shared across test cases"""
+    return types.MappingProxyType(_cached_mock_prompt(provider_id, model_name))
+
+
+# Common shape of an optimize_for_provider result; tests overlay what differs
+_BASE_OPTIMIZE_RESULT = {
+    "success": True,
+    "run_id": None,
+    "optimized_prompt_id": None,
+    "performance_improvement": 0.18,
+    "training_examples": 5,
+    "mode": "cheap",
+    "provider_id": None,
+}
+
+
+def _result(**overrides) -> dict:
+    """Build an optimization result from the base template plus overrides"""
+    return {**_BASE_OPTIMIZE_RESULT, **overrides}
+
+
+# Supported AI providers
+_PROVIDERS = ("gemini", "openai", "anthropic", "openrouter")
+
+# Stand-in connection for stubbed lookups that pass the db through untouched
+_SENTINEL_DB = object()
+
+# Phrases from the Chrome extension prompt that an optimized prompt must keep
+_SOPHISTICATION_MARKERS = (
+    "vastly preferable to return zero",
+    "golden nuggets",
+    "high-signal content",
+)
+
+
+def _assert_sophisticated(prompt: str):
+    """Assert every sophistication marker survived, reporting all that are missing"""
+    missing = [marker for marker in _SOPHISTICATION_MARKERS if marker not in prompt]
+    assert not missing, f"missing markers: {missing}"
+
+
+class TestProviderSpecificOptimization:
+    """Test provider-specific optimization with Chrome extension prompts"""
 
     @pytest.fixture
-    async def mock_db_with_provider_feedback(self):
+    def mock_db_with_provider_feedback(self):
         """Create mock database with provider-specific feedback data"""
         mock_db = AsyncMock()
         mock_cursor = AsyncMock()
 
-        # Mock feedback data with provider information
-        mock_cursor.fetchall.return_value = [
-            (
-                "feedback_gemini_1",
-                json.dumps(
-                    {
-                        "content": "Technical article about async programming",
-                        "analysis": {
-                            "golden_nuggets": [
-                                {
-                                    "type": "aha! moments",
-                                    "content": "The key insight about async/await is that it's syntactic sugar over Promises, making asynchronous code readable while avoiding callback hell.",
-                                    "startContent": "The key insight about async/await",
-                                    "endContent": "avoiding callback hell",
-                                }
-                            ]
-                        },
-                        "provider": "gemini",
-                        "model": "gemini-2.5-flash",
-                    }
-                ),
-                5,  # rating
-                "2024-01-01T00:00:00Z",
-            ),
-            (
-                "feedback_openai_1",
-                json.dumps(
-                    {
-                        "content": "Productivity tools comparison article",
-                        "analysis": {
-                            "golden_nuggets": [
-                                {
-                                    "type": "tool",
-                                    "content": "I use Notion's database templates with rollup properties to automatically track project progress across multiple workspaces, which eliminates manual status updates.",
-                                    "startContent": "I use Notion's database templates",
-                                    "endContent": "manual status updates",
-                                }
-                            ]
-                        },
-                        "provider": "openai",
-                        "model": "gpt-4",
-                    }
-                ),
-                4,  # rating
-                "2024-01-02T00:00:00Z",
-            ),
-            (
-                "feedback_anthropic_1",
-                json.dumps(
-                    {
-                        "content": "Mental models for decision making",
-                        "analysis": {
-                            "golden_nuggets": [
-                                {
-                                    "type": "model",
-                                    "content": "The 'Inversion' mental model works by asking 'What would guarantee failure?' before starting a project, helping identify risks proactively instead of just planning for success.",
-                                    "startContent": "The 'Inversion' mental model works",
-                                    "endContent": "planning for success",
-                                }
-                            ]
-                        },
-                        "provider": "anthropic",
-                        "model": "claude-3-sonnet",
-                    }
-                ),
-                5,  # rating
-                "2024-01-03T00:00:00Z",
-            ),
-        ]
+        mock_cursor.fetchall.return_value = list(_PROVIDER_FEEDBACK_ROWS)
 
         mock_db.execute.return_value = mock_cursor
         mock_db.commit = AsyncMock()
 
         return mock_db
 
+    @pytest.fixture
+    def stub_mmm(self, optimization_service, monkeypatch):
+        """
+        Replace multi-model manager methods with lightweight recording stubs.
+
+        Returns a ``_stub(method_name, return_value=None, side_effect=None,
+        target=None)`` helper that swaps the method via ``monkeypatch`` and
+        returns the list of ``(args, kwargs)`` the stub was called with.
+        Coroutine methods get an async stub so callers can still await them.
+        """
+        manager = optimization_service.multi_model_manager
+
+        def _stub(method_name, return_value=None, side_effect=None, target=None):
+            target = manager if target is None else target
+            calls = []
+
+            def _record(*args, **kwargs):
+                calls.append((args, kwargs))
+                if isinstance(side_effect, BaseException):
+                    raise side_effect
+                if callable(side_effect):
+                    return side_effect(*args, **kwargs)
+                return return_value
+
+            if inspect.iscoroutinefunction(getattr(target, method_name)):
+
+                async def stub(*args, **kwargs):
+                    return _record(*args, **kwargs)
+
+            else:
+                stub = _record
+
+            monkeypatch.setattr(target, method_name, stub)
+            return calls
+
+        return _stub
+
+    @pytest.mark.parametrize("provider_id", _PROVIDERS)
     @pytest.mark.asyncio
     async def test_provider_optimization_triggers(
-        self, optimization_service, mock_db_with_provider_feedback, providers
+        self,
+        optimization_service,
+        stub_mmm,
+        mock_db_with_provider_feedback,
+        provider_id,
     ):
         """Test that provider-specific optimization can be triggered for each provider"""
 
-        for provider_id in providers:
-            with patch.object(
-                optimization_service.multi_model_manager, "optimize_for_provider"
-            ) as mock_optimize:
-                mock_optimize.return_value = {
-                    "success": True,
-                    "run_id": f"run_{provider_id}",
-                    "optimized_prompt_id": f"prompt_{provider_id}",
-                    "performance_improvement": 0.18,
-                    "training_examples": 5,
-                    "mode": "cheap",
-                    "provider_id": provider_id,
-                }
-
-                result = await optimization_service.run_provider_optimization(
-                    mock_db_with_provider_feedback,
-                    provider_id=provider_id,
-                    mode="cheap",
-                    auto_trigger=False,
-                )
-
-                assert result["success"] is True
-                assert result["provider_id"] == provider_id
-                assert result["run_id"] == f"run_{provider_id}"
-
-                # Verify the optimization was called with correct parameters
-                mock_optimize.assert_called_once_with(
-                    mock_db_with_provider_feedback, provider_id, "cheap", False
-                )
+        calls = stub_mmm(
+            "optimize_for_provider",
+            return_value=_result(
+                run_id=f"run_{provider_id}",
+                optimized_prompt_id=f"prompt_{provider_id}",
+                provider_id=provider_id,
+            ),
+        )
+
+        result = await optimization_service.run_provider_optimization(
+            mock_db_with_provider_feedback,
+            provider_id=provider_id,
+            mode="cheap",
+            auto_trigger=False,
+        )
+
+        assert result["success"] is True
+        assert result["provider_id"] == provider_id
+        assert result["run_id"] == f"run_{provider_id}"
+
+        # Verify the optimization was called with correct parameters
+        assert calls == [
+            ((mock_db_with_provider_feedback, provider_id, "cheap", False), {})
+        ]
 
     @pytest.mark.asyncio
     async def test_provider_threshold_checking(
-        self, optimization_service, mock_db_with_provider_feedback, providers
+        self,
+        optimization_service,
+        stub_mmm,
+        mock_db_with_provider_feedback,
     ):
         """Test threshold checking for each provider"""
 
-        with patch.object(
-            optimization_service.multi_model_manager, "should_optimize_provider"
-        ) as mock_should_optimize:
-            # Mock different threshold states for different providers
-            mock_should_optimize.side_effect = lambda db, provider_id: {
+        # Mock different threshold states for different providers
+        stub_mmm(
+            "should_optimize_provider",
+            side_effect=lambda db, provider_id: {
                 "should_optimize": provider_id
                 in ["gemini", "anthropic"],  # Only some meet threshold
                 "total_feedback": 25 if provider_id in ["gemini", "anthropic"] else 15,
                 "threshold_met": provider_id in ["gemini", "anthropic"],
                 "provider_id": provider_id,
-            }
+            },
+        )
 
-            results = await optimization_service.check_provider_optimization_thresholds(
-                mock_db_with_provider_feedback
-            )
+        results = await optimization_service.check_provider_optimization_thresholds(
+            mock_db_with_provider_feedback
+        )
 
-            # Verify results for each provider
-            assert len(results) == len(providers)
+        # Verify results for each provider
+        assert len(results) == len(_PROVIDERS)
 
-            for provider_id in providers:
-                assert provider_id in results
-                result = results[provider_id]
+        for provider_id in _PROVIDERS:
+            assert provider_id in results
+            result = results[provider_id]
 
-                if provider_id in ["gemini", "anthropic"]:
-                    assert result["should_optimize"] is True
-                    assert result["total_feedback"] == 25
-                else:
-                    assert result["should_optimize"] is False
-                    assert result["total_feedback"] == 15
+            if provider_id in ["gemini", "anthropic"]:
+                assert result["should_optimize"] is True
+                assert result["total_feedback"] == 25
+            else:
+                assert result["should_optimize"] is False
+                assert result["total_feedback"] == 15
 
     @pytest.mark.asyncio
     async def test_auto_trigger_provider_optimizations(
-        self, optimization_service, mock_db_with_provider_feedback
+        self, optimization_service, stub_mmm, mock_db_with_provider_feedback
     ):
         """Test automatic triggering of provider optimizations"""
 
-        with patch.object(
-            optimization_service, "check_provider_optimization_thresholds"
-        ) as mock_check:
-            with patch.object(
-                optimization_service, "run_provider_optimization"
-            ) as mock_optimize:
-                # Mock threshold results - some providers meet threshold
-                mock_check.return_value = {
-                    "gemini": {
-                        "should_optimize": True,
-                        "total_feedback": 30,
-                        "threshold_met": True,
-                    },
-                    "openai": {
-                        "should_optimize": False,
-                        "total_feedback": 10,
-                        "threshold_met": False,
-                    },
-                    "anthropic": {
-                        "should_optimize": True,
-                        "total_feedback": 25,
-                        "threshold_met": True,
-                    },
-                    "openrouter": {
-                        "should_optimize": False,
-                        "total_feedback": 5,
-                        "threshold_met": False,
-                    },
-                }
-
-                # Mock optimization results
-                mock_optimize.return_value = {
-                    "success": True,
-                    "run_id": "auto_run_123",
-                    "performance_improvement": 0.20,
-                    "training_examples": 30,
-                }
-
-                results = (
-                    await optimization_service.auto_trigger_provider_optimizations(
-                        mock_db_with_provider_feedback
-                    )
-                )
-
-                # Verify triggering results
-                assert len(results["triggered"]) == 2  # gemini and anthropic
-                assert len(results["skipped"]) == 2  # openai and openrouter
-                assert len(results["errors"]) == 0
-
-                # Verify correct providers were triggered
-                triggered_providers = [
-                    item["provider_id"] for item in results["triggered"]
-                ]
-                assert "gemini" in triggered_providers
-                assert "anthropic" in triggered_providers
-
-                # Verify skipped providers
-                skipped_providers = [item["provider_id"] for item in results["skipped"]]
-                assert "openai" in skipped_providers
-                assert "openrouter" in skipped_providers
-
+        # Mock threshold results - some providers meet threshold
+        stub_mmm(
+            "check_provider_optimization_thresholds",
+            target=optimization_service,
+            return_value={
+                "gemini": {
+                    "should_optimize": True,
+                    "total_feedback": 30,
+                    "threshold_met": True,
+                },
+                "openai": {
+                    "should_optimize": False,
+                    "total_feedback": 10,
+                    "threshold_met": False,
+                },
+                "anthropic": {
+                    "should_optimize": True,
+                    "total_feedback": 25,
+                    "threshold_met": True,
+                },
+                "openrouter": {
+                    "should_optimize": False,
+                    "total_feedback": 5,
+                    "threshold_met": False,
+                },
+            },
+        )
+
+        # Mock optimization results
+        stub_mmm(
+            "run_provider_optimization",
+            target=optimization_service,
+            return_value={
+                "success": True,
+                "run_id": "auto_run_123",
+                "performance_improvement": 0.20,
+                "training_examples": 30,
+            },
+        )
+
+        results = await optimization_service.auto_trigger_provider_optimizations(
+            mock_db_with_provider_feedback
+        )
+
+        # Verify triggering results
+        assert len(results["triggered"]) == 2  # gemini and anthropic
+        assert len(results["skipped"]) == 2  # openai and openrouter
+        assert len(results["errors"]) == 0
+
+        # Verify correct providers were triggered and skipped
+        triggered_providers = {item["provider_id"] for item in results["triggered"]}
+        skipped_providers = {item["provider_id"] for item in results["skipped"]}
+        assert triggered_providers == {"gemini", "anthropic"}
+        assert skipped_providers == {"openai", "openrouter"}
+
+    @pytest.mark.parametrize("provider_id", _PROVIDERS)
     @pytest.mark.asyncio
     async def test_provider_current_prompt_retrieval(
-        self, optimization_service, providers
+        self, optimization_service, stub_mmm, provider_id
     ):
         """Test retrieving current optimized prompt for each provider"""
 
-        mock_db = AsyncMock()
+        mock_db = _SENTINEL_DB
 
-        for provider_id in providers:
-            with patch.object(
-                optimization_service.multi_model_manager, "get_provider_current_prompt"
-            ) as mock_get_prompt:
-                # Mock provider-specific optimized prompt
-                mock_prompt = {
-                    "id": f"prompt_{provider_id}",
-                    "version": 2,
-                    "prompt": f"## ROLE & GOAL:\nProvider-optimized prompt for {provider_id} with high quality standards approach...",
-                    "optimizationDate": "2024-01-10T00:00:00Z",
-                    "performance": {"feedbackCount": 25, "positiveRate": 0.85},
-                    "providerSpecific": True,
-                    "modelProvider": provider_id,
-                    "modelName": "model-name",
-                }
-
-                mock_get_prompt.return_value = mock_prompt
-
-                result = await optimization_service.get_provider_current_prompt(
-                    mock_db, provider_id
-                )
+        # Mock provider-specific optimized prompt
+        calls = stub_mmm(
+            "get_provider_current_prompt",
+            return_value=_make_mock_prompt(provider_id),
+        )
+
+        result = await optimization_service.get_provider_current_prompt(
+            mock_db, provider_id
+        )
 
-                assert result["id"] == f"prompt_{provider_id}"
-                assert result["providerSpecific"] is True
-                assert result["modelProvider"] == provider_id
-                assert "high quality standards" in result["prompt"]
+        assert result["id"] == f"prompt_{provider_id}_model-name"
+        assert result["providerSpecific"] is True
+        assert result["modelProvider"] == provider_id
+        assert "high quality standards" in result["prompt"]
 
-                mock_get_prompt.assert_called_once_with(mock_db, provider_id)
+        assert calls == [((mock_db, provider_id), {})]
 
     @pytest.mark.asyncio
     async def test_provider_optimization_with_chrome_extension_features(
-        self, optimization_service, mock_db_with_provider_feedback, caplog
+        self, optimization_service, stub_mmm, mock_db_with_provider_feedback
     ):
         """Test that provider optimization preserves Chrome extension sophisticated features"""
 
         provider_id = "gemini"
 
-        with patch.object(
-            optimization_service.multi_model_manager, "optimize_for_provider"
-        ) as mock_optimize:
-            # Mock optimization result that preserves sophisticated features
-            optimized_prompt = (
-                optimization_service.chrome_extension_default_prompt
-                + f"\n\n# Optimized for {provider_id}"
-            )
+        # Mock optimization result that preserves sophisticated features
+        optimized_prompt = (
+            optimization_service.chrome_extension_default_prompt
+            + f"\n\n# Optimized for {provider_id}"
+        )
+
+        stub_mmm(
+            "optimize_for_provider",
+            return_value=_result(
+                run_id=f"run_{provider_id}",
+                optimized_prompt=optimized_prompt,
+                performance_improvement=0.22,
+                training_examples=8,
+                provider_id=provider_id,
+                preserves_sophistication=True,
+            ),
+        )
 
-            mock_optimize.return_value = {
-                "success": True,
-                "run_id": f"run_{provider_id}",
-                "optimized_prompt": optimized_prompt,
-                "performance_improvement": 0.22,
-                "training_examples": 8,
-                "mode": "cheap",
-                "provider_id": provider_id,
-                "preserves_sophistication": True,
-            }
+        result = await optimization_service.run_provider_optimization(
+            mock_db_with_provider_feedback,
+            provider_id=provider_id,
+            mode="cheap",
+        )
 
-            with caplog.at_level(logging.INFO):
-                result = await optimization_service.run_provider_optimization(
-                    mock_db_with_provider_feedback,
-                    provider_id=provider_id,
-                    mode="cheap",
-                )
+        assert result["success"] is True
 
-            assert result["success"] is True
-
-            # Verify quality features are preserved in the result
-            if "optimized_prompt" in result:
-                optimized = result["optimized_prompt"]
-                assert "vastly preferable to return zero" in optimized
-                assert "golden nuggets" in optimized
-                assert "high-signal content" in optimized
+        # Verify quality features are preserved in the result
+        if "optimized_prompt" in result:
+            _assert_sophisticated(result["optimized_prompt"])
 
     @pytest.mark.asyncio
     async def test_provider_optimization_error_handling(
-        self, optimization_service, mock_db_with_provider_feedback
+        self, optimization_service, stub_mmm, mock_db_with_provider_feedback
     ):
         """Test error handling during provider-specific optimization"""
 
         provider_id = "gemini"
 
-        with patch.object(
-            optimization_service.multi_model_manager, "optimize_for_provider"
-        ) as mock_optimize:
-            # Mock optimization failure
-            mock_optimize.side_effect = Exception("Provider optimization failed")
-
-            with pytest.raises(Exception, match="Provider optimization failed"):
-                await optimization_service.run_provider_optimization(
-                    mock_db_with_provider_feedback,
-                    provider_id=provider_id,
-                    mode="cheap",
-                )
+        # Mock optimization failure
+        stub_mmm(
+            "optimize_for_provider",
+            side_effect=Exception("Provider optimization failed"),
+        )
+
+        with pytest.raises(Exception, match="Provider optimization failed"):
+            await optimization_service.run_provider_optimization(
+                mock_db_with_provider_feedback,
+                provider_id=provider_id,
+                mode="cheap",
+            )
 
+    @pytest.mark.parametrize("provider_id", _PROVIDERS)
     @pytest.mark.asyncio
-    async def test_provider_progress_tracking(self, optimization_service, providers):
+    async def test_provider_progress_tracking(
+        self, optimization_service, stub_mmm, provider_id
+    ):
         """Test progress tracking for provider-specific optimizations"""
 
-        for provider_id in providers:
-            run_id = f"test_run_{provider_id}"
-
-            with patch.object(
-                optimization_service.multi_model_manager, "get_provider_run_progress"
-            ) as mock_get_progress:
-                mock_progress = {
-                    "step": "optimization",
-                    "progress": 75,
-                    "message": f"Optimizing {provider_id} prompt",
-                    "timestamp": "2024-01-15T10:30:00Z",
-                    "provider_id": provider_id,
-                    "run_id": run_id,
-                }
-
-                mock_get_progress.return_value = mock_progress
-
-                result = optimization_service.get_provider_run_progress(
-                    provider_id, run_id
-                )
+        run_id = f"test_run_{provider_id}"
+
+        calls = stub_mmm(
+            "get_provider_run_progress",
+            return_value={
+                "step": "optimization",
+                "progress": 75,
+                "message": f"Optimizing {provider_id} prompt",
+                "timestamp": "2024-01-15T10:30:00Z",
+                "provider_id": provider_id,
+                "run_id": run_id,
+            },
+        )
 
-                assert result["provider_id"] == provider_id
-                assert result["run_id"] == run_id
-                assert result["progress"] == 75
+        result = optimization_service.get_provider_run_progress(provider_id, run_id)
 
-                mock_get_progress.assert_called_once_with(provider_id, run_id)
+        assert result["provider_id"] == provider_id
+        assert result["run_id"] == run_id
+        assert result["progress"] == 75
+
+        assert calls == [((provider_id, run_id), {})]
 
     @pytest.mark.asyncio
-    async def test_all_provider_active_runs(self, optimization_service):
+    async def test_all_provider_active_runs(self, optimization_service, stub_mmm):
         """Test retrieving active runs across all providers"""
 
-        with patch.object(
-            optimization_service.multi_model_manager, "get_all_provider_active_runs"
-        ) as mock_get_all_runs:
-            mock_active_runs = {
+        stub_mmm(
+            "get_all_provider_active_runs",
+            return_value={
                 "gemini": {
                     "run_123": {
                         "step": "optimization",
@@ -417,21 +481,20 @@ class TestProviderSpecificOptimization:
                         "message": "Storing OpenRouter optimization",
                     }
                 },
-            }
-
-            mock_get_all_runs.return_value = mock_active_runs
+            },
+        )
 
-            result = optimization_service.get_all_provider_active_runs()
+        result = optimization_service.get_all_provider_active_runs()
 
-            assert "gemini" in result
-            assert "openai" in result
-            assert "anthropic" in result
-            assert "openrouter" in result
+        assert "gemini" in result
+        assert "openai" in result
+        assert "anthropic" in result
+        assert "openrouter" in result
 
-            assert len(result["gemini"]) == 2
-            assert len(result["openai"]) == 1
-            assert len(result["anthropic"]) == 0
-            assert len(result["openrouter"]) == 1
+        assert len(result["gemini"]) == 2
+        assert len(result["openai"]) == 1
+        assert len(result["anthropic"]) == 0
+        assert len(result["openrouter"]) == 1
 
     @pytest.mark.parametrize(
         "provider_id,model_name",
@@ -444,112 +507,118 @@ class TestProviderSpecificOptimization:
     )
     @pytest.mark.asyncio
     async def test_provider_model_specific_prompts(
-        self, optimization_service, provider_id, model_name
+        self, optimization_service, stub_mmm, provider_id, model_name
     ):
         """Test provider+model specific prompt retrieval"""
 
-        mock_db = AsyncMock()
+        mock_db = _SENTINEL_DB
 
-        with patch.object(
-            optimization_service, "get_current_prompt_for_provider_model"
-        ) as mock_get_prompt:
-            mock_prompt = {
-                "id": f"prompt_{provider_id}_{model_name.replace('/', '_')}",
-                "version": 3,
-                "prompt": f"## ROLE & GOAL:\nOptimized for {provider_id} {model_name} with high quality standards approach...",
-                "optimizationDate": "2024-01-12T00:00:00Z",
-                "performance": {"feedbackCount": 35, "positiveRate": 0.89},
-                "providerSpecific": True,
-                "modelProvider": provider_id,
-                "modelName": model_name,
-            }
+        stub_mmm(
+            "get_current_prompt_for_provider_model",
+            target=optimization_service,
+            return_value=_make_mock_prompt(provider_id, model_name),
+        )
 
-            mock_get_prompt.return_value = mock_prompt
+        result = await optimization_service.get_current_prompt_for_provider_model(
+            mock_db, provider_id, model_name
+        )
 
-            result = await optimization_service.get_current_prompt_for_provider_model(
-                mock_db, provider_id, model_name
-            )
-
-            assert result["modelProvider"] == provider_id
-            assert result["modelName"] == model_name
-            assert result["providerSpecific"] is True
-            assert "high quality standards" in result["prompt"]
+        assert result["modelProvider"] == provider_id
+        assert result["modelName"] == model_name
+        assert result["providerSpecific"] is True
+        assert "high quality standards" in result["prompt"]
 
+    @pytest.mark.parametrize(
+        "mode,expected_min_improvement",
+        [
+            ("cheap", 0.10),
+            ("expensive", 0.20),  # Expensive mode should show better improvement
+        ],
+    )
     @pytest.mark.asyncio
     async def test_provider_optimization_modes(
-        self, optimization_service, mock_db_with_provider_feedback
+        self,
+        optimization_service,
+        stub_mmm,
+        mock_db_with_provider_feedback,
+        mode,
+        expected_min_improvement,
     ):
         """Test both cheap and expensive optimization modes for providers"""
 
         provider_id = "gemini"
-        modes = ["cheap", "expensive"]
-
-        for mode in modes:
-            with patch.object(
-                optimization_service.multi_model_manager, "optimize_for_provider"
-            ) as mock_optimize:
-                mock_optimize.return_value = {
-                    "success": True,
-                    "run_id": f"run_{provider_id}_{mode}",
-                    "optimized_prompt_id": f"prompt_{provider_id}_{mode}",
-                    "performance_improvement": 0.25 if mode == "expensive" else 0.15,
-                    "training_examples": 10,
-                    "mode": mode,
-                    "provider_id": provider_id,
-                }
-
-                result = await optimization_service.run_provider_optimization(
-                    mock_db_with_provider_feedback, provider_id=provider_id, mode=mode
-                )
 
-                assert result["success"] is True
-                assert result["mode"] == mode
-                assert result["provider_id"] == provider_id
+        stub_mmm(
+            "optimize_for_provider",
+            return_value=_result(
+                run_id=f"run_{provider_id}_{mode}",
+                optimized_prompt_id=f"prompt_{provider_id}_{mode}",
+                performance_improvement=0.25 if mode == "expensive" else 0.15,
+                training_examples=10,
+                mode=mode,
+                provider_id=provider_id,
+            ),
+        )
+
+        result = await optimization_service.run_provider_optimization(
+            mock_db_with_provider_feedback, provider_id=provider_id, mode=mode
+        )
 
-                # Expensive mode should show better improvement
-                if mode == "expensive":
-                    assert result["performance_improvement"] > 0.20
-                else:
-                    assert result["performance_improvement"] >= 0.10
+        assert result["success"] is True
+        assert result["mode"] == mode
+        assert result["provider_id"] == provider_id
+        assert result["performance_improvement"] >= expected_min_improvement
 
+    @pytest.mark.skipif(
+        sys.version_info < (3, 11), reason="asyncio.TaskGroup requires Python 3.11+"
+    )
     @pytest.mark.asyncio
     async def test_cross_provider_optimization_independence(
-        self, optimization_service, mock_db_with_provider_feedback
+        self, optimization_service, mock_db_with_provider_feedback, monkeypatch
     ):
         """Test that provider optimizations don't interfere with each other"""
 
         providers = ["gemini", "anthropic"]
+        calls = []
+
+        async def fake_optimize(db, provider_id, mode, auto_trigger=False):
+            calls.append(provider_id)
+            await asyncio.sleep(0)  # Yield so the runs actually interleave
+            return _result(
+                run_id=f"concurrent_run_{provider_id}",
+                optimized_prompt_id=f"concurrent_prompt_{provider_id}",
+                training_examples=12,
+                mode=mode,
+                provider_id=provider_id,
+            )
 
-        # Start optimizations for multiple providers simultaneously
-        optimization_tasks = []
-
-        for provider_id in providers:
-            with patch.object(
-                optimization_service.multi_model_manager, "optimize_for_provider"
-            ) as mock_optimize:
-                mock_optimize.return_value = {
-                    "success": True,
-                    "run_id": f"concurrent_run_{provider_id}",
-                    "optimized_prompt_id": f"concurrent_prompt_{provider_id}",
-                    "performance_improvement": 0.18,
-                    "training_examples": 12,
-                    "mode": "cheap",
-                    "provider_id": provider_id,
-                }
-
-                task = optimization_service.run_provider_optimization(
-                    mock_db_with_provider_feedback,
-                    provider_id=provider_id,
-                    mode="cheap",
+        # Install a single stub that stays active while the runs execute
+        monkeypatch.setattr(
+            optimization_service.multi_model_manager,
+            "optimize_for_provider",
+            fake_optimize,
+        )
+
+        # Start optimizations for multiple providers simultaneously; the task
+        # group re-raises the first failure, so results are all real dicts
+        async with asyncio.TaskGroup() as tg:
+            optimization_tasks = [
+                tg.create_task(
+                    optimization_service.run_provider_optimization(
+                        mock_db_with_provider_feedback,
+                        provider_id=provider_id,
+                        mode="cheap",
+                    )
                 )
-                optimization_tasks.append(task)
+                for provider_id in providers
+            ]
 
-        # Wait for all optimizations to complete
-        results = await asyncio.gather(*optimization_tasks, return_exceptions=True)
+        results = [task.result() for task in optimization_tasks]
 
         # Verify all completed successfully and independently
+        assert sorted(calls) == sorted(providers)
         assert len(results) == len(providers)
-        for i, result in enumerate(results):
-            if not isinstance(result, Exception):
-                assert result["success"] is True
-                assert result["provider_id"] == providers[i]
+        for provider_id, result in zip(providers, results):
+            assert result["success"] is True
+            assert result["provider_id"] == provider_id
+            assert result["run_id"] == f"concurrent_run_{provider_id}"
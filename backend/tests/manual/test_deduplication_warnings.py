@@ -6,19 +6,23 @@ Tests the enhanced feedback API to verify that duplicate submissions
 generate appropriate user-friendly warning messages.
 """
 
-from datetime import datetime
+import asyncio
+import json
+import time
 
-import requests
+import httpx
 
 # Backend API URL
 BASE_URL = "http://localhost:7532"
 
 
-def test_duplicate_feedback():
+async def test_duplicate_feedback(client: httpx.AsyncClient):
     """Test duplicate feedback submission and deduplication warnings"""
 
     print("=== Testing Deduplication Warning System ===\n")
 
+    ts = time.time_ns() // 1_000_000  # Client timestamp in ms, shared by all items
+
     # Test data for duplicate submission
     feedback_data = {
         "nuggetFeedback": [
@@ -28,7 +32,7 @@ def test_duplicate_feedback():
                 "originalType": "tool",
                 "correctedType": None,
                 "rating": "positive",
-                "timestamp": int(datetime.now().timestamp() * 1000),
+                "timestamp": ts,
                 "url": "https://example.com/test-page",
                 "context": "When writing unit tests in Python, pytest-mock provides a cleaner interface for mocking compared to unittest.mock. It integrates seamlessly with pytest fixtures.",
             }
@@ -38,16 +42,23 @@ def test_duplicate_feedback():
                 "id": "test-missing-001",
                 "content": "Consider using dataclasses for structured data in Python",
                 "suggestedType": "tool",
-                "timestamp": int(datetime.now().timestamp() * 1000),
+                "timestamp": ts,
                 "url": "https://example.com/test-page",
                 "context": "Python's dataclasses module provides a decorator and functions for automatically adding generated special methods to user-defined classes.",
             }
         ],
     }
 
+    # The same payload is posted three times, so encode it once
+    body = json.dumps(feedback_data).encode()
+    headers = {"Content-Type": "application/json"}
+
+    # The three submissions must stay sequential since each one checks the
+    # counts left by the previous
+
     # Submit feedback first time (should be new)
     print("1. Submitting feedback for the first time...")
-    response = requests.post(f"{BASE_URL}/feedback", json=feedback_data)
+    response = await client.post("/feedback", content=body, headers=headers)
 
     if response.status_code == 200:
         result = response.json()
@@ -73,7 +84,7 @@ def test_duplicate_feedback():
 
     # Submit the SAME feedback again (should be detected as duplicate)
     print("2. Submitting the same feedback again (should detect duplicates)...")
-    response = requests.post(f"{BASE_URL}/feedback", json=feedback_data)
+    response = await client.post("/feedback", content=body, headers=headers)
 
     if response.status_code == 200:
         result = response.json()
@@ -107,7 +118,7 @@ def test_duplicate_feedback():
 
     # Submit one more time to test higher counts
     print("3. Submitting the same feedback a third time (testing higher counts)...")
-    response = requests.post(f"{BASE_URL}/feedback", json=feedback_data)
+    response = await client.post("/feedback", content=body, headers=headers)
 
     if response.status_code == 200:
         result = response.json()
@@ -126,12 +137,14 @@ def test_duplicate_feedback():
         print(f"   Error: {response.text}")
 
 
-def test_mixed_duplicate_scenario():
+async def test_mixed_duplicate_scenario(client: httpx.AsyncClient):
     """Test scenario with mixed new and duplicate feedback"""
 
     print("\n" + "=" * 60 + "\n")
     print("4. Testing mixed scenario (1 new, 1 duplicate)...")
 
+    ts = time.time_ns() // 1_000_000  # Client timestamp in ms, shared by all items
+
     # Submit feedback with one new item and one that already exists
     mixed_data = {
         "nuggetFeedback": [
@@ -141,7 +154,7 @@ def test_mixed_duplicate_scenario():
                 "originalType": "tool",
                 "correctedType": None,
                 "rating": "positive",
-                "timestamp": int(datetime.now().timestamp() * 1000),
+                "timestamp": ts,
                 "url": "https://example.com/test-page",
                 "context": "When writing unit tests in Python, pytest-mock provides a cleaner interface for mocking compared to unittest.mock.",
             },
@@ -151,14 +164,14 @@ def test_mixed_duplicate_scenario():
                 "originalType": "tool",
                 "correctedType": None,
                 "rating": "positive",
-                "timestamp": int(datetime.now().timestamp() * 1000),
+                "timestamp": ts,
                 "url": "https://example.com/test-page",
                 "context": "Black is an opinionated Python code formatter that handles formatting automatically.",
             },
         ]
     }
 
-    response = requests.post(f"{BASE_URL}/feedback", json=mixed_data)
+    response = await client.post("/feedback", json=mixed_data)
 
     if response.status_code == 200:
         result = response.json()
@@ -176,12 +189,20 @@ def test_mixed_duplicate_scenario():
         print(f"❌ Mixed submission failed: {response.status_code}")
 
 
+async def main():
+    """Run the scenarios in order; the mixed one relies on the first"""
+    # One keep-alive client (connection pool) shared by both scenarios
+    limits = httpx.Limits(max_connections=10, keepalive_expiry=30)
+    async with httpx.AsyncClient(base_url=BASE_URL, limits=limits) as client:
+        await test_duplicate_feedback(client)
+        await test_mixed_duplicate_scenario(client)
+
+
 if __name__ == "__main__":
     try:
-        test_duplicate_feedback()
-        test_mixed_duplicate_scenario()
+        asyncio.run(main())
         print("\n🎉 All deduplication warning tests completed!")
-    except requests.exceptions.ConnectionError:
+    except httpx.ConnectError:
         print("❌ Could not connect to backend. Is it running on localhost:7532?")
         print("   Try: docker-compose --profile dev up backend-dev")
     except Exception as e:
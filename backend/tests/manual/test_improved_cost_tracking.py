@@ -6,7 +6,10 @@ Test script demonstrating the improved cost tracking service using DSPy's built-
 import asyncio
 import os
 from pathlib import Path
+import shutil
+import sqlite3
 import sys
+import tempfile
 
 # Add the backend directory to Python path
 backend_dir = Path(__file__).parent.parent.parent
@@ -19,12 +22,21 @@ import dspy  # type: ignore[import-untyped]
 from app.services.improved_cost_tracking_service import ImprovedCostTrackingService
 
 
-async def setup_test_database():
-    """Set up a test database with the cost_tracking table"""
-    db = await aiosqlite.connect(":memory:")
+async def setup_test_database(run_id: str, db_path: str):
+    """
+    Set up a test database with the cost_tracking table and a test run.
 
-    # Create the cost_tracking table
-    await db.execute("""
+    Returns a (writer, reader) pair of connections to the same WAL-mode file:
+    cost tracking writes go through the writer while run cost reports use the
+    read-only connection, so reads never queue behind a committing write.
+    """
+    # Pure scaffolding, so build it with plain sqlite3 rather than paying an
+    # aiosqlite worker-thread round-trip per statement
+    setup_db = sqlite3.connect(db_path)
+    setup_db.executescript("""
+        PRAGMA journal_mode = WAL;
+
+        -- Create the cost_tracking table
         CREATE TABLE cost_tracking (
             id TEXT PRIMARY KEY,
             optimization_run_id TEXT NOT NULL,
@@ -33,13 +45,16 @@ async def setup_test_database():
             input_tokens INTEGER NOT NULL,
             output_tokens INTEGER NOT NULL,
             cost_usd REAL NOT NULL,
-            timestamp TEXT NOT NULL,
+            created_at TEXT NOT NULL,
             metadata TEXT
-        )
-    """)
+        );
 
-    # Create optimization_runs table
-    await db.execute("""
+        -- Covering index: run cost totals are summed from the index alone
+        CREATE INDEX idx_cost_tracking_run_operation ON cost_tracking(
+            optimization_run_id, operation_type, cost_usd, input_tokens, output_tokens
+        );
+
+        -- Create optimization_runs table
         CREATE TABLE optimization_runs (
             id TEXT PRIMARY KEY,
             started_at TEXT NOT NULL,
@@ -47,11 +62,26 @@ async def setup_test_database():
             total_tokens INTEGER DEFAULT 0,
             input_tokens INTEGER DEFAULT 0,
             output_tokens INTEGER DEFAULT 0
-        )
+        );
     """)
+    with setup_db:
+        setup_db.execute(
+            "INSERT INTO optimization_runs (id, started_at) VALUES (?, ?)",
+            (run_id, "2024-01-01T00:00:00Z"),
+        )
+
+    setup_db.close()
 
-    await db.commit()
-    return db
+    # The service API is async, so it gets aiosqlite connections. Autocommit
+    # mode avoids extra commit round-trips and a larger statement cache keeps
+    # the repeated INSERT/SELECT statements compiled.
+    writer = await aiosqlite.connect(
+        db_path, isolation_level=None, cached_statements=256
+    )
+    reader = await aiosqlite.connect(
+        f"file:{db_path}?mode=ro", uri=True, cached_statements=256
+    )
+    return writer, reader
 
 
 def setup_dspy_with_gemini():
@@ -77,24 +107,20 @@ async def test_improved_cost_tracking():
     print("🧪 Testing Improved Cost Tracking Service")
     print("=" * 50)
 
-    # Set up test environment
-    db = await setup_test_database()
-    lm = setup_dspy_with_gemini()
-    cost_service = ImprovedCostTrackingService()
-
-    # Create a test optimization run
+    # Set up test environment with a test optimization run
     run_id = "test-run-123"
-    await db.execute(
-        "INSERT INTO optimization_runs (id, started_at) VALUES (?, ?)",
-        (run_id, "2024-01-01T00:00:00Z"),
+    db_dir = tempfile.mkdtemp(prefix="improved_cost_tracking_")
+    db, read_db = await setup_test_database(
+        run_id, os.path.join(db_dir, "cost_tracking.db")
     )
-    await db.commit()
+    lm = setup_dspy_with_gemini()
+    cost_service = ImprovedCostTrackingService()
 
     print(f"✅ Test setup complete. Run ID: {run_id}")
 
     # Simulate Operation 1: Initial prompt generation
     print("\n🔥 Operation 1: Initial prompt generation")
-    lm.history.clear()  # Start fresh
+    start = len(lm.history)  # Snapshot instead of clearing the shared history
 
     # Make some API calls
     response1 = lm("Generate a prompt for extracting golden nuggets from web content.")
@@ -111,6 +137,7 @@ async def test_improved_cost_tracking():
         operation_type="prompt_generation",
         operation_name="Initial prompt creation",
         metadata={"version": "1.0", "optimization_phase": "initialization"},
+        start_index=start,
     )
 
     print(f"💰 Operation 1 cost: ${cost_breakdown['operation_cost']:.6f}")
@@ -120,18 +147,24 @@ async def test_improved_cost_tracking():
 
     # Simulate Operation 2: Optimization
     print("\n🧠 Operation 2: Optimization phase")
-    lm.history.clear()  # Start fresh for next operation
-
-    # Make more API calls
-    response3 = lm(
-        "Analyze this content for golden nuggets: 'Machine learning transforms healthcare by enabling predictive analytics.'"
+    start = len(lm.history)  # Only count calls made from here on
+
+    # Make more API calls; the three prompts are independent, so run the
+    # blocking lm() calls on worker threads and overlap their round-trips
+    response3, response4, response5 = await asyncio.gather(
+        asyncio.to_thread(
+            lm,
+            "Analyze this content for golden nuggets: 'Machine learning transforms healthcare by enabling predictive analytics.'",
+        ),
+        asyncio.to_thread(
+            lm, "What are three key benefits of renewable energy systems?"
+        ),
+        asyncio.to_thread(
+            lm, "Explain the concept of compound interest in simple terms."
+        ),
     )
     print(f"Response 3: {response3[0][:100]}...")
-
-    response4 = lm("What are three key benefits of renewable energy systems?")
     print(f"Response 4: {response4[0][:100]}...")
-
-    response5 = lm("Explain the concept of compound interest in simple terms.")
     print(f"Response 5: {response5[0][:100]}...")
 
     # Track the optimization cost
@@ -142,6 +175,7 @@ async def test_improved_cost_tracking():
         operation_type="optimization",
         operation_name="Content analysis optimization",
         metadata={"version": "1.0", "optimization_phase": "main"},
+        start_index=start,
     )
 
     print(f"💰 Operation 2 cost: ${cost_breakdown2['operation_cost']:.6f}")
@@ -150,7 +184,7 @@ async def test_improved_cost_tracking():
 
     # Get run costs summary
     print("\n📊 Run Cost Summary")
-    run_costs = await cost_service.get_run_costs(db, run_id)
+    run_costs = await cost_service.get_run_costs(read_db, run_id)
 
     print(f"Total run cost: ${run_costs['total_cost']:.6f}")
     print(f"Total tokens: {run_costs['total_tokens']}")
@@ -178,7 +212,9 @@ async def test_improved_cost_tracking():
     print(f"Accurate: {realtime_cost['accurate']}")
 
     # Clean up
+    await read_db.close()
     await db.close()
+    shutil.rmtree(db_dir)
 
     print("\n" + "=" * 50)
     print("🎉 IMPROVED COST TRACKING TEST COMPLETE")
@@ -10,96 +10,160 @@ Run with: FORCE_TEST_DB=1 python3 tests/manual/test_multi_provider_optimization.
 
 import asyncio
 from datetime import datetime, timezone
+import functools
+from itertools import repeat
 import os
+import sqlite3
 import sys
 
 # Add parent directory to path to import app modules
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", ".."))
 
-from app.database import get_db, init_database
+from app.database import (
+    CONNECTION_PRAGMAS,
+    get_db,
+    get_test_database_path,
+    init_database,
+)
 from app.services.dspy_multi_model_manager import dspy_multi_model_manager
 from app.services.optimization_service import OptimizationService
 
 
-async def create_sample_feedback(
-    db, provider_id: str, model_name: str, count: int = 60
-):
+@functools.lru_cache(maxsize=1)
+def get_optimization_service() -> OptimizationService:
+    """Shared OptimizationService for the whole script run"""
+    # Each instance builds its own thread pool and prompt state; the checks
+    # here don't need a fresh one (dspy_multi_model_manager is already shared)
+    return OptimizationService()
+
+
+# Sample feedback templates, cycled through by item index; "{i}" is filled in
+# per item and every negative_every-th item of a template is rated negative
+SAMPLE_FEEDBACK_TEMPLATES = (
+    {
+        "content": "This is a great tool for developers - Tool #{i}",
+        "type": "tool",
+        "negative_every": 3,
+        "context": "Sample context for feedback item {i}",
+        "url": "https://example.com/page/{i}",
+    },
+    {
+        "content": 'This book "Advanced Programming #{i}" is excellent',
+        "type": "media",
+        "negative_every": 4,
+        "context": "Book recommendation context {i}",
+        "url": "https://example.com/books/{i}",
+    },
+    {
+        "content": "The concept of microservices #{i} is well explained here",
+        "type": "aha! moments",
+        "negative_every": 5,
+        "context": "Technical aha! moments context {i}",
+        "url": "https://example.com/concepts/{i}",
+    },
+)
+
+
+NUGGET_FEEDBACK_INSERT_SQL = """
+    INSERT INTO nugget_feedback (
+        id, nugget_content, original_type, corrected_type, rating,
+        url, context, model_provider, model_name, client_timestamp
+    ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+"""
+
+MISSING_CONTENT_INSERT_SQL = """
+    INSERT INTO missing_content_feedback (
+        id, content, suggested_type, url, context,
+        model_provider, model_name, client_timestamp
+    ) VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+"""
+
+
+def _seed_sync(db_path: str, nugget_rows: list[tuple], missing_rows: list[tuple]):
+    """Bulk insert seeding rows in one transaction on a plain sqlite3 connection"""
+    conn = sqlite3.connect(db_path, isolation_level=None)
+    try:
+        for pragma in CONNECTION_PRAGMAS:
+            conn.execute(pragma)
+        # IMMEDIATE takes the write lock up front, so concurrent seeders queue
+        # on busy_timeout instead of failing a read-to-write lock upgrade
+        conn.execute("BEGIN IMMEDIATE")
+        conn.executemany(NUGGET_FEEDBACK_INSERT_SQL, nugget_rows)
+        conn.executemany(MISSING_CONTENT_INSERT_SQL, missing_rows)
+        conn.execute("COMMIT")
+    finally:
+        conn.close()
+
+
+async def create_sample_feedback(provider_id: str, model_name: str, count: int = 60):
     """Create sample feedback data for testing optimization"""
     print(f"📝 Creating {count} sample feedback items for {provider_id}...")
 
-    for i in range(count):
-        sample_feedback = [
-            {
-                "content": f"This is a great tool for developers - Tool #{i}",
-                "type": "tool",
-                "rating": "positive" if i % 3 != 0 else "negative",
-                "context": f"Sample context for feedback item {i}",
-                "url": f"https://example.com/page/{i}",
-            },
-            {
-                "content": f'This book "Advanced Programming #{i}" is excellent',
-                "type": "media",
-                "rating": "positive" if i % 4 != 0 else "negative",
-                "context": f"Book recommendation context {i}",
-                "url": f"https://example.com/books/{i}",
-            },
-            {
-                "content": f"The concept of microservices #{i} is well explained here",
-                "type": "aha! moments",
-                "rating": "positive" if i % 5 != 0 else "negative",
-                "context": f"Technical aha! moments context {i}",
-                "url": f"https://example.com/concepts/{i}",
-            },
-        ]
+    # Format the shared timestamp once: every row binds the same plain string
+    # rather than running sqlite3's datetime adapter per row. The " " separator
+    # keeps the stored text identical to what the adapter would produce.
+    ts = datetime.now(timezone.utc).isoformat(" ")
+    # Build the rows column by column (struct-of-arrays) and zip them once at
+    # the end, so each column is a flat comprehension with no per-row branching
+    indices = range(count)
+    templates = [
+        SAMPLE_FEEDBACK_TEMPLATES[i % len(SAMPLE_FEEDBACK_TEMPLATES)] for i in indices
+    ]
+    types = [template["type"] for template in templates]
+    ratings = [
+        "negative" if i % template["negative_every"] == 0 else "positive"
+        for i, template in zip(indices, templates)
+    ]
+    urls = [template["url"].format(i=i) for i, template in zip(indices, templates)]
+    contexts = [
+        template["context"].format(i=i) for i, template in zip(indices, templates)
+    ]
 
-        feedback_item = sample_feedback[i % len(sample_feedback)]
-
-        # Insert nugget feedback
-        await db.execute(
-            """
-            INSERT INTO nugget_feedback (
-                id, nugget_content, original_type, corrected_type, rating,
-                url, context, model_provider, model_name, client_timestamp
-            ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-            """,
-            (
-                f"{provider_id}-feedback-{i}",
-                feedback_item["content"],
-                feedback_item["type"],
-                "aha! moments"
-                if feedback_item["rating"] == "negative" and i % 10 == 0
-                else None,
-                feedback_item["rating"],
-                feedback_item["url"],
-                feedback_item["context"],
-                provider_id,
-                model_name,
-                datetime.now(timezone.utc),
-            ),
+    nugget_rows = list(
+        zip(
+            [f"{provider_id}-feedback-{i}" for i in indices],
+            [
+                template["content"].format(i=i)
+                for i, template in zip(indices, templates)
+            ],
+            types,
+            [
+                "aha! moments" if rating == "negative" and i % 10 == 0 else None
+                for i, rating in zip(indices, ratings)
+            ],
+            ratings,
+            urls,
+            contexts,
+            repeat(provider_id),
+            repeat(model_name),
+            repeat(ts),
         )
+    )
 
-        # Add some missing content feedback too
-        if i % 10 == 0:
-            await db.execute(
-                """
-                INSERT INTO missing_content_feedback (
-                    id, content, suggested_type, url, context,
-                    model_provider, model_name, client_timestamp
-                ) VALUES (?, ?, ?, ?, ?, ?, ?, ?)
-                """,
-                (
-                    f"{provider_id}-missing-{i}",
-                    f"Missing insight about {feedback_item['type']} #{i}",
-                    "analogy",
-                    feedback_item["url"],
-                    feedback_item["context"],
-                    provider_id,
-                    model_name,
-                    datetime.now(timezone.utc),
-                ),
-            )
+    # Add some missing content feedback too, for every 10th item, reusing that
+    # item's already formatted url and context columns
+    missing_indices = indices[::10]
+    missing_rows = list(
+        zip(
+            [f"{provider_id}-missing-{i}" for i in missing_indices],
+            [
+                f"Missing insight about {item_type} #{i}"
+                for i, item_type in zip(missing_indices, types[::10])
+            ],
+            repeat("analogy"),
+            urls[::10],
+            contexts[::10],
+            repeat(provider_id),
+            repeat(model_name),
+            repeat(ts),
+        )
+    )
 
-    await db.commit()
+    # Seeding is test-only scaffolding, so skip aiosqlite's per-statement
+    # thread hops and insert everything from one worker thread
+    await asyncio.to_thread(
+        _seed_sync, get_test_database_path(), nugget_rows, missing_rows
+    )
     print(f"✅ Created sample feedback for {provider_id}")
 
 
@@ -108,7 +172,7 @@ async def test_provider_optimization_thresholds():
     print("\n🔍 Testing provider optimization thresholds...")
 
     async with get_db() as db:
-        optimization_service = OptimizationService()
+        optimization_service = get_optimization_service()
 
         # Check thresholds for all providers
         threshold_results = (
@@ -136,7 +200,7 @@ async def test_provider_specific_optimization(provider_id: str):
     print(f"\n🚀 Testing optimization for {provider_id}...")
 
     async with get_db() as db:
-        optimization_service = OptimizationService()
+        optimization_service = get_optimization_service()
 
         try:
             # Run provider-specific optimization
@@ -171,12 +235,18 @@ async def test_multi_provider_manager_directly():
     """Test the multi-model manager directly"""
     print("\n🔧 Testing DSPy Multi-Model Manager directly...")
 
+    providers = ("gemini", "openai")
+
     async with get_db() as db:
-        # Test getting provider feedback
-        for provider_id in ["gemini", "openai"]:
-            feedback = await dspy_multi_model_manager._get_provider_feedback(
-                db, provider_id
+        # Test getting provider feedback; the lookups are independent, so queue
+        # them all on the connection at once instead of awaiting each in turn
+        feedbacks = await asyncio.gather(
+            *(
+                dspy_multi_model_manager._get_provider_feedback(db, provider_id)
+                for provider_id in providers
             )
+        )
+        for provider_id, feedback in zip(providers, feedbacks):
             print(f"   {provider_id}: {len(feedback)} feedback items")
 
             if feedback:
@@ -188,10 +258,13 @@ async def test_multi_provider_manager_directly():
                 print(f"      Model: {sample.get('model_name')}")
 
         # Test should_optimize_provider
-        for provider_id in ["gemini", "openai"]:
-            should_optimize = await dspy_multi_model_manager.should_optimize_provider(
-                db, provider_id
+        decisions = await asyncio.gather(
+            *(
+                dspy_multi_model_manager.should_optimize_provider(db, provider_id)
+                for provider_id in providers
             )
+        )
+        for provider_id, should_optimize in zip(providers, decisions):
             print(
                 f"   {provider_id} should optimize: {should_optimize['should_optimize']}"
             )
@@ -284,15 +357,20 @@ async def main():
     print("✅ Test database initialized")
 
     try:
-        # Create sample data for testing
-        async with get_db() as db:
-            # Create sample feedback for different providers
-            await create_sample_feedback(db, "gemini", "gemini-2.5-flash", 65)
-            await create_sample_feedback(db, "openai", "gpt-4o-mini", 55)
-            await create_sample_feedback(
-                db, "anthropic", "claude-3-5-sonnet", 30
-            )  # Below threshold
-            await create_sample_feedback(db, "openrouter", "deepseek/deepseek-r1", 70)
+        # Create sample feedback for different providers concurrently; the
+        # providers' rows are disjoint and each seeding uses its own connection
+        # (with busy_timeout set, so SQLite's single writer lock just queues)
+        await asyncio.gather(
+            *(
+                create_sample_feedback(provider_id, model_name, count)
+                for provider_id, model_name, count in (
+                    ("gemini", "gemini-2.5-flash", 65),
+                    ("openai", "gpt-4o-mini", 55),
+                    ("anthropic", "claude-3-5-sonnet", 30),  # Below threshold
+                    ("openrouter", "deepseek/deepseek-r1", 70),
+                )
+            )
+        )
 
         # Test provider optimization thresholds
         threshold_results = await test_provider_optimization_thresholds()
@@ -6,56 +6,53 @@ Run all error handling tests to verify system resilience.
 """
 
 import os
-import subprocess
 import sys
 
+import pytest
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Section title -> test file, for each error handling suite
+TEST_SUITES = {
+    "🔬 Unit Tests - Service Layer Error Handling": (
+        "tests/unit/test_error_handling.py"
+    ),
+    "🌐 Integration Tests - API Error Handling": (
+        "tests/integration/test_api_error_handling.py"
+    ),
+}
+
 
 def run_tests():
     """Run all error handling tests"""
     print("🧪 Running Error Handling Tests")
     print("=" * 50)
 
-    # Change to backend directory
-    backend_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
-    os.chdir(backend_dir)
-
-    # Run unit tests
-    print("\n🔬 Unit Tests - Service Layer Error Handling")
+    for title, test_path in TEST_SUITES.items():
+        print(f"{title}: {test_path}")
     print("-" * 50)
-    result1 = subprocess.run(
-        [
-            "python",
-            "-m",
-            "pytest",
-            "tests/unit/test_error_handling.py",
-            "-v",
-            "--tb=short",
-        ],
-        capture_output=False,
-    )
 
-    # Run integration tests
-    print("\n🌐 Integration Tests - API Error Handling")
-    print("-" * 50)
-    result2 = subprocess.run(
+    # Both suites run as one pytest session instead of a subprocess per
+    # suite. xdist still starts an interpreter per worker; --dist=loadgroup
+    # keeps each xdist_group-marked class together on one worker
+    exit_code = pytest.main(
         [
-            "python",
-            "-m",
-            "pytest",
-            "tests/integration/test_api_error_handling.py",
+            "--rootdir",
+            BACKEND_DIR,
             "-v",
             "--tb=short",
-        ],
-        capture_output=False,
+            "-n",
+            "auto",
+            "--dist=loadgroup",
+            *(os.path.join(BACKEND_DIR, path) for path in TEST_SUITES.values()),
+        ]
     )
 
     # Summary
     print("\n📊 Test Summary")
     print("=" * 50)
 
-    total_success = result1.returncode == 0 and result2.returncode == 0
-
-    if total_success:
+    if exit_code == pytest.ExitCode.OK:
         print("✅ All error handling tests passed!")
         print("\n🎯 System Resilience Demonstrated:")
         print("   • Database error scenarios")
@@ -67,9 +64,8 @@ def run_tests():
         print("   • Security and abuse prevention")
     else:
         print("❌ Some tests failed - check output above")
-        return 1
 
-    return 0
+    return int(exit_code)
 
 
 if __name__ == "__main__":
@@ -5,12 +5,11 @@ Verifies that tests don't interfere with each other and that each test
 gets a clean database state.
 """
 
-from fastapi.testclient import TestClient
+import os
 
-from app.database import get_test_database_path, is_test_environment
-from app.main import app
+import pytest
 
-client = TestClient(app)
+from app.database import get_test_database_path, is_test_environment
 
 
 def test_environment_detection():
@@ -18,7 +17,7 @@ def test_environment_detection():
     assert is_test_environment(), "Should detect test environment when running pytest"
 
 
-def test_database_isolation_first(clean_database):
+def test_database_isolation_first(client, clean_database):
     """First test to verify database isolation"""
     # Submit some feedback
     feedback_data = {
@@ -52,7 +51,7 @@ def test_database_isolation_first(clean_database):
     assert "test_feedback.db" in db_path
 
 
-def test_database_isolation_second(clean_database):
+def test_database_isolation_second(client, clean_database):
     """Second test to verify database isolation - should have clean state"""
     # This test should start with a completely clean database
     # despite the previous test adding feedback
@@ -89,7 +88,16 @@ def test_database_paths_are_unique(clean_database):
     assert "golden_nuggets_test_" in db_path
 
 
-def test_concurrent_tests_dont_interfere_1(clean_database):
+def test_database_path_is_tagged_with_xdist_worker(clean_database):
+    """Test that pytest-xdist workers get database paths named after them"""
+    worker = os.environ.get("PYTEST_XDIST_WORKER")
+    if worker is None:
+        pytest.skip("Not running under pytest-xdist")
+
+    assert f"golden_nuggets_test_{worker}_" in get_test_database_path()
+
+
+def test_concurrent_tests_dont_interfere_1(client, clean_database):
     """Test 1 of concurrent interference check"""
     # Add feedback with specific ID
     feedback_data = {
@@ -112,7 +120,7 @@ def test_concurrent_tests_dont_interfere_1(clean_database):
     assert response.status_code == 200
 
 
-def test_concurrent_tests_dont_interfere_2(clean_database):
+def test_concurrent_tests_dont_interfere_2(client, clean_database):
     """Test 2 of concurrent interference check"""
     # This test should not see data from concurrent test 1
 
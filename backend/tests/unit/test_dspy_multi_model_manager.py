@@ -6,58 +6,157 @@ progress tracking, and fallback mechanisms.
 """
 
 from datetime import datetime, timezone
+from typing import NamedTuple
 from unittest.mock import AsyncMock, Mock, patch
 
+import aiosqlite
 import pytest
+import pytest_asyncio
+
+from app.database import get_db
 
 # Import the classes under test
 from app.services.dspy_multi_model_manager import (
+    FEEDBACK_FETCH_CHUNK_SIZE,
     DSPyMultiModelManager,
     dspy_multi_model_manager,
 )
 
+_PROVIDERS = ("gemini", "openai", "anthropic", "openrouter")
+
+
+class _Demo(NamedTuple):
+    """Plain stand-in for a DSPy demo; only these two fields are read"""
+
+    content: str
+    golden_nuggets: str
+
+
+# Long enough that the extracted prompt has to truncate it
+_LONG_DEMO = _Demo(
+    content="Test input content for demo 1" * 10,
+    golden_nuggets='{"golden_nuggets": [{"type": "tool", "content": "demo output"}]}',
+)
+
+
+# Rows of the single UNION ALL feedback query: nugget rows first, then missing
+# content rows padded to the same width, each tagged with its kind
+_FEEDBACK_ROWS = (
+    (
+        "nugget",
+        "content1",
+        "tool",
+        "aha! moments",
+        "positive",
+        "context1",
+        "url1",
+        "openai",
+        "gpt-4o-mini",
+        "2025-01-31T12:00:00Z",
+    ),
+    (
+        "nugget",
+        "content2",
+        "media",
+        None,
+        "negative",
+        "context2",
+        "url2",
+        "openai",
+        "gpt-4o-mini",
+        "2025-01-31T13:00:00Z",
+    ),
+    (
+        "missing_content",
+        "missing1",
+        "analogy",
+        None,
+        None,
+        "context3",
+        "url3",
+        "openai",
+        "gpt-4o-mini",
+        "2025-01-31T14:00:00Z",
+    ),
+)
+
+
+class FakeCursor:
+    """Lightweight aiosqlite cursor double: fetch methods plus chunked iteration"""
+
+    def __init__(self, rows=None, row=None):
+        self.fetchall = AsyncMock(return_value=rows)
+        self.fetchone = AsyncMock(return_value=row)
+        self.iter_chunk_size = 64
+        self.chunks_fetched = 0
+        self._rows = rows or []
+
+    async def __aiter__(self):
+        # Mirror aiosqlite: rows arrive iter_chunk_size at a time
+        for start in range(0, len(self._rows), self.iter_chunk_size):
+            self.chunks_fetched += 1
+            for row in self._rows[start : start + self.iter_chunk_size]:
+                yield row
+
+
+@pytest.fixture
+def make_cursor():
+    """Build lightweight cursor doubles"""
+    return FakeCursor
+
+
+@pytest.fixture
+def mock_db():
+    """Create a mock database connection limited to aiosqlite's interface"""
+    mock_db = AsyncMock(spec_set=aiosqlite.Connection)
+    # aiosqlite wraps execute in its own awaitable context manager, which the
+    # spec doesn't recognise as async, so make it awaitable explicitly
+    mock_db.execute = AsyncMock()
+    return mock_db
 
+
+@pytest.fixture(scope="class")
+def manager():
+    """Create one DSPy Multi-Model Manager instance shared by the test class"""
+    manager = DSPyMultiModelManager()
+    yield manager
+    manager.executor.shutdown(wait=False)
+
+
+# Keep the class on one xdist worker under --dist=loadgroup so the
+# class-scoped manager is built once rather than once per worker
+@pytest.mark.xdist_group("dspy_manager")
 class TestDSPyMultiModelManager:
     """Test suite for DSPy Multi-Model Manager"""
 
-    @pytest.fixture
-    def manager(self):
-        """Create a fresh DSPy Multi-Model Manager instance for testing"""
-        return DSPyMultiModelManager()
-
-    @pytest.fixture
-    def mock_db(self):
-        """Create a mock database connection"""
-        mock_db = AsyncMock()
-        mock_db.execute = AsyncMock()
-        mock_db.commit = AsyncMock()
-        mock_db.fetchone = AsyncMock()
-        mock_db.fetchall = AsyncMock()
-        return mock_db
+    @pytest.fixture(autouse=True)
+    def reset_manager_state(self, manager):
+        """Give each test an empty progress registry on the shared manager"""
+        manager.active_runs_by_provider = {}
 
     def test_manager_initialization(self, manager):
         """Test that manager initializes with correct configuration"""
         assert manager.min_feedback_threshold == 50
         assert manager.min_training_examples == 10
-        assert "gemini" in manager.baseline_prompts
-        assert "openai" in manager.baseline_prompts
-        assert "anthropic" in manager.baseline_prompts
-        assert "openrouter" in manager.baseline_prompts
-
-        # Check that baseline prompts contain expected content
-        for provider_id, prompt in manager.baseline_prompts.items():
-            assert "golden nuggets" in prompt.lower()
-            assert "json" in prompt.lower()
-            # Check that provider is mentioned in some form in the prompt
-            provider_mentioned = (
-                provider_id.lower() in prompt.lower()
-                or provider_id.replace("_", " ").title() in prompt
-                or provider_id.replace("_", "").upper()
-                in prompt  # For OpenAI -> OPENAI
-            )
-            assert provider_mentioned, (
-                f"Provider {provider_id} not mentioned in prompt: {prompt[:100]}..."
-            )
+        assert set(_PROVIDERS) <= manager.baseline_prompts.keys()
+
+    @pytest.mark.parametrize("provider_id", _PROVIDERS)
+    def test_provider_baseline_prompt(self, manager, provider_id):
+        """Test that each provider's baseline prompt has the expected content"""
+        prompt = manager.baseline_prompts[provider_id]
+        lowered = prompt.lower()
+
+        assert "golden nuggets" in lowered
+        assert "json" in lowered
+        # Check that provider is mentioned in some form in the prompt
+        provider_mentioned = (
+            provider_id in lowered
+            or provider_id.replace("_", " ").title() in prompt
+            or provider_id.replace("_", "").upper() in prompt  # For OpenAI -> OPENAI
+        )
+        assert provider_mentioned, (
+            f"Provider {provider_id} not mentioned in prompt: {prompt[:100]}..."
+        )
 
     def test_baseline_prompt_generation(self, manager):
         """Test that baseline prompts are generated correctly for each provider"""
@@ -70,6 +169,10 @@ class TestDSPyMultiModelManager:
         assert "OpenAI GPT" in openai_prompt
         assert "golden_nuggets" in openai_prompt
 
+        # Prompts are cached per provider name, so repeat lookups are free
+        assert manager._get_baseline_prompt("Google Gemini") is gemini_prompt
+        assert manager.baseline_prompts["gemini"] is gemini_prompt
+
     @patch("app.services.dspy_multi_model_manager.DSPY_AVAILABLE", new=False)
     async def test_optimize_for_provider_dspy_unavailable(self, manager, mock_db):
         """Test that optimization fails gracefully when DSPy is not available"""
@@ -85,91 +188,72 @@ class TestDSPyMultiModelManager:
                 mock_db, "invalid_provider", "cheap", auto_trigger=False
             )
 
-    async def test_get_provider_feedback(self, manager, mock_db):
+    @pytest.mark.parametrize(
+        "feedback_rows",
+        [pytest.param((), id="empty"), pytest.param(_FEEDBACK_ROWS, id="populated")],
+    )
+    async def test_get_provider_feedback(
+        self, manager, mock_db, make_cursor, feedback_rows
+    ):
         """Test fetching provider-specific feedback data"""
-        # Mock database responses
-        nugget_feedback_data = [
-            (
-                "content1",
-                "tool",
-                "aha! moments",
-                "positive",
-                "context1",
-                "url1",
-                "openai",
-                "gpt-4o-mini",
-                "2025-01-31T12:00:00Z",
-            ),
-            (
-                "content2",
-                "media",
-                None,
-                "negative",
-                "context2",
-                "url2",
-                "openai",
-                "gpt-4o-mini",
-                "2025-01-31T13:00:00Z",
-            ),
-        ]
-
-        missing_feedback_data = [
-            (
-                "missing1",
-                "analogy",
-                "context3",
-                "url3",
-                "openai",
-                "gpt-4o-mini",
-                "2025-01-31T14:00:00Z",
-            )
-        ]
-
-        # Configure mock to return data for sequential calls
-        mock_db.execute.side_effect = [
-            # First call for nugget_feedback
-            AsyncMock(fetchall=AsyncMock(return_value=nugget_feedback_data)),
-            # Second call for missing_content_feedback
-            AsyncMock(fetchall=AsyncMock(return_value=missing_feedback_data)),
-        ]
-
-        # Mock cursor objects
-        mock_cursor1 = AsyncMock()
-        mock_cursor1.fetchall.return_value = nugget_feedback_data
-        mock_cursor2 = AsyncMock()
-        mock_cursor2.fetchall.return_value = missing_feedback_data
-
-        mock_db.execute.side_effect = [mock_cursor1, mock_cursor2]
+        mock_db.execute.return_value = make_cursor(rows=feedback_rows)
 
         # Test the method
         feedback_data = await manager._get_provider_feedback(mock_db, "openai")
 
-        # Verify results
-        assert len(feedback_data) == 3  # 2 nugget + 1 missing
-        assert feedback_data[0]["content"] == "content1"
-        assert feedback_data[0]["model_provider"] == "openai"
-        assert feedback_data[0]["feedback_type"] == "nugget"
-        assert feedback_data[2]["feedback_type"] == "missing_content"
+        # Verify results: one training item per row, in query order
+        assert [item["feedback_type"] for item in feedback_data] == [
+            row[0] for row in feedback_rows
+        ]
+        assert [item["content"] for item in feedback_data] == [
+            row[1] for row in feedback_rows
+        ]
+        for item, row in zip(feedback_data, feedback_rows):
+            assert item["context"] == row[5]
+            assert item["model_provider"] == row[7]
+            if item["feedback_type"] == "nugget":
+                assert item["original_type"] == row[2]
+                assert item["corrected_type"] == row[3]
+                assert item["rating"] == row[4]
+            else:
+                assert item["suggested_type"] == row[2]
+
+        # Verify both feedback kinds came from one database round-trip
+        assert mock_db.execute.call_count == 1
+
+    async def test_get_provider_feedback_streams_in_chunks(
+        self, manager, mock_db, make_cursor
+    ):
+        """Test that feedback rows are consumed in bounded batches"""
+        row = (
+            "nugget",
+            "content",
+            "tool",
+            None,
+            "positive",
+            "context",
+            "url",
+            "gemini",
+            "gemini-2.5-flash",
+            "2025-01-31T12:00:00Z",
+        )
+        cursor = make_cursor(rows=[row] * (FEEDBACK_FETCH_CHUNK_SIZE + 1))
+        mock_db.execute.return_value = cursor
 
-        # Verify database calls
-        assert mock_db.execute.call_count == 2
+        feedback_data = await manager._get_provider_feedback(mock_db, "gemini")
 
-    async def test_should_optimize_provider(self, manager, mock_db):
+        assert len(feedback_data) == FEEDBACK_FETCH_CHUNK_SIZE + 1
+        assert cursor.iter_chunk_size == FEEDBACK_FETCH_CHUNK_SIZE
+        assert cursor.chunks_fetched == 2
+        cursor.fetchall.assert_not_called()
+
+    async def test_should_optimize_provider(self, manager, mock_db, make_cursor):
         """Test provider optimization threshold checking"""
         # Mock database responses for feedback stats
-        mock_cursor1 = AsyncMock()
-        mock_cursor1.fetchone.return_value = (
-            75,
-            20,
-            "2025-01-31T12:00:00Z",
-        )  # total, negative, last_feedback
-
-        mock_cursor2 = AsyncMock()
-        mock_cursor2.fetchone.return_value = (
-            "2025-01-24T12:00:00Z",
-        )  # last_optimization (7 days ago)
-
-        mock_db.execute.side_effect = [mock_cursor1, mock_cursor2]
+        # total, negative, last_feedback, last_optimization (7 days earlier)
+        mock_db.execute.return_value = make_cursor(
+            row=(75, 20, "2025-01-31T12:00:00Z", "2025-01-24T12:00:00Z")
+        )
 
         result = await manager.should_optimize_provider(mock_db, "openai")
 
@@ -179,23 +263,17 @@ class TestDSPyMultiModelManager:
         assert result["total_feedback"] == 75
         assert result["negative_rate"] == 20 / 75  # 20 negative out of 75 total
         assert result["threshold_met"]
+        assert mock_db.execute.call_count == 1
 
     async def test_should_optimize_provider_insufficient_feedback(
-        self, manager, mock_db
+        self, manager, mock_db, make_cursor
     ):
         """Test provider optimization with insufficient feedback"""
         # Mock database responses - insufficient feedback
-        mock_cursor1 = AsyncMock()
-        mock_cursor1.fetchone.return_value = (
-            25,
-            5,
-            "2025-01-31T12:00:00Z",
-        )  # Only 25 feedback items
-
-        mock_cursor2 = AsyncMock()
-        mock_cursor2.fetchone.return_value = (None,)  # No previous optimization
-
-        mock_db.execute.side_effect = [mock_cursor1, mock_cursor2]
+        # Only 25 items and no previous optimization
+        mock_db.execute.return_value = make_cursor(
+            row=(25, 5, "2025-01-31T12:00:00Z", None)
+        )
 
         result = await manager.should_optimize_provider(mock_db, "anthropic")
 
@@ -245,16 +323,7 @@ class TestDSPyMultiModelManager:
         mock_module.extract.signature = Mock()
         mock_module.extract.signature.__doc__ = "Test signature doc"
 
-        # Mock demonstrations
-        demo1 = Mock()
-        demo1.content = (
-            "Test input content for demo 1" * 10
-        )  # Make it long to test truncation
-        demo1.golden_nuggets = (
-            '{"golden_nuggets": [{"type": "tool", "content": "demo output"}]}'
-        )
-
-        mock_module.extract.demos = [demo1]
+        mock_module.extract.demos = [_LONG_DEMO]
 
         result = manager._extract_provider_prompt(mock_module, "anthropic")
 
@@ -312,25 +381,26 @@ class TestDSPyMultiModelManager:
 
     def test_get_all_provider_active_runs(self, manager):
         """Test getting all active runs across providers"""
-        # Setup test data
+        # Setup test data, all stamped with the same time
+        now = datetime.now(timezone.utc)
         manager.active_runs_by_provider = {
             "openai": {
                 "run1": {
                     "step": "optimization",
                     "progress": 30,
-                    "last_updated": datetime.now(timezone.utc),
+                    "last_updated": now,
                 },
                 "run2": {
                     "step": "evaluation",
                     "progress": 80,
-                    "last_updated": datetime.now(timezone.utc),
+                    "last_updated": now,
                 },
             },
             "gemini": {
                 "run3": {
                     "step": "storing",
                     "progress": 95,
-                    "last_updated": datetime.now(timezone.utc),
+                    "last_updated": now,
                 }
             },
         }
@@ -351,7 +421,7 @@ class TestDSPyMultiModelManager:
         # Should result in empty configs if DSPy not available
         # The actual behavior depends on DSPY_AVAILABLE constant
 
-    async def test_store_provider_optimized_prompt(self, manager, mock_db):
+    async def test_store_provider_optimized_prompt(self, manager, mock_db, make_cursor):
         """Test storing optimized prompts for specific providers"""
         optimization_result = {
             "optimized_prompt": "Test optimized prompt for provider",
@@ -361,10 +431,11 @@ class TestDSPyMultiModelManager:
         }
 
         # Mock database responses
-        mock_cursor1 = AsyncMock()
-        mock_cursor1.fetchone.return_value = (5,)  # Next version number
-
-        mock_db.execute.side_effect = [mock_cursor1, AsyncMock(), AsyncMock()]
+        mock_db.execute.side_effect = [
+            make_cursor(row=(5, None)),  # Next version number, no identical prompt
+            make_cursor(),
+            make_cursor(),
+        ]
 
         result = await manager._store_provider_optimized_prompt(
             mock_db, optimization_result, "test-run-789", "openai"
@@ -380,6 +451,27 @@ class TestDSPyMultiModelManager:
         )  # version query, update current, insert new
         assert mock_db.commit.call_count == 1
 
+    async def test_store_provider_optimized_prompt_unchanged(
+        self, manager, mock_db, make_cursor
+    ):
+        """Test that re-storing the current prompt text reuses its row"""
+        optimization_result = {
+            "optimized_prompt": "Test optimized prompt for provider",
+            "training_examples_count": 100,
+            "performance_score": 0.85,
+            "model_name": "gpt-4o-mini",
+        }
+        mock_db.execute.return_value = make_cursor(row=(6, "current-prompt-id"))
+
+        result = await manager._store_provider_optimized_prompt(
+            mock_db, optimization_result, "test-run-790", "openai"
+        )
+
+        assert result == "current-prompt-id"
+        # Only the version/duplicate lookup; no update, insert or commit
+        assert mock_db.execute.call_count == 1
+        mock_db.commit.assert_not_called()
+
 
 class TestGlobalInstance:
     """Test the global dspy_multi_model_manager instance"""
@@ -400,41 +492,21 @@ class TestGlobalInstance:
 class TestAsyncFunctionality:
     """Test async functionality that requires pytest-asyncio"""
 
-    async def test_async_provider_feedback_empty_result(self):
-        """Test getting provider feedback with empty database"""
-        manager = DSPyMultiModelManager()
-        mock_db = AsyncMock()
-
-        # Mock empty results
-        mock_cursor1 = AsyncMock()
-        mock_cursor1.fetchall.return_value = []
-        mock_cursor2 = AsyncMock()
-        mock_cursor2.fetchall.return_value = []
-
-        mock_db.execute.side_effect = [mock_cursor1, mock_cursor2]
-
-        result = await manager._get_provider_feedback(mock_db, "gemini")
-
-        assert result == []
-        assert mock_db.execute.call_count == 2
-
-    async def test_async_get_provider_current_prompt_not_found(self):
+    async def test_async_get_provider_current_prompt_not_found(
+        self, mock_db, make_cursor
+    ):
         """Test getting current prompt when none exists"""
         manager = DSPyMultiModelManager()
-        mock_db = AsyncMock()
 
-        mock_cursor = AsyncMock()
-        mock_cursor.fetchone.return_value = None
-        mock_db.execute.return_value = mock_cursor
+        mock_db.execute.return_value = make_cursor(row=None)
 
         result = await manager.get_provider_current_prompt(mock_db, "anthropic")
 
         assert result is None
 
-    async def test_async_get_provider_current_prompt_found(self):
+    async def test_async_get_provider_current_prompt_found(self, mock_db, make_cursor):
         """Test getting current prompt when it exists"""
         manager = DSPyMultiModelManager()
-        mock_db = AsyncMock()
 
         mock_data = (
             "prompt-id-123",
@@ -445,9 +517,7 @@ class TestAsyncFunctionality:
             0.85,
             "claude-3-5-sonnet",
         )
-        mock_cursor = AsyncMock()
-        mock_cursor.fetchone.return_value = mock_data
-        mock_db.execute.return_value = mock_cursor
+        mock_db.execute.return_value = make_cursor(row=mock_data)
 
         result = await manager.get_provider_current_prompt(mock_db, "anthropic")
 
@@ -459,3 +529,158 @@ class TestAsyncFunctionality:
         assert result["model_name"] == "claude-3-5-sonnet"
         assert result["performance"]["feedbackCount"] == 100
         assert result["performance"]["positiveRate"] == 0.85
+
+
+@pytest_asyncio.fixture
+async def sqlite_db(clean_database):
+    """Real connection to this test's freshly migrated database"""
+    async with get_db() as db:
+        yield db
+
+
+@pytest.mark.slow
+class TestAsyncFunctionalityWithDatabase:
+    """The TestAsyncFunctionality scenarios against a real SQLite database"""
+
+    async def test_provider_feedback_empty_database(self, manager, sqlite_db):
+        """Test getting provider feedback with empty database"""
+        result = await manager._get_provider_feedback(sqlite_db, "gemini")
+
+        assert result == []
+
+    async def test_provider_feedback_only_returns_provider_rows(
+        self, manager, sqlite_db
+    ):
+        """Test that both feedback kinds are returned for the provider only"""
+        await sqlite_db.executemany(
+            """
+            INSERT INTO nugget_feedback (
+                id, nugget_content, original_type, rating, url, context,
+                model_provider, model_name, client_timestamp
+            ) VALUES (?, ?, 'tool', 'positive', 'url', 'context', ?, ?, 1)
+            """,
+            [
+                ("nugget-1", "Gemini nugget", "gemini", "gemini-2.5-flash"),
+                ("nugget-2", "OpenAI nugget", "openai", "gpt-4o-mini"),
+            ],
+        )
+        await sqlite_db.execute(
+            """
+            INSERT INTO missing_content_feedback (
+                id, content, suggested_type, url, context,
+                model_provider, model_name, client_timestamp
+            ) VALUES ('missing-1', 'Missed insight', 'analogy', 'url', 'context',
+                      'gemini', 'gemini-2.5-flash', 1)
+            """
+        )
+        await sqlite_db.commit()
+
+        result = await manager._get_provider_feedback(sqlite_db, "gemini")
+
+        assert [item["content"] for item in result] == [
+            "Gemini nugget",
+            "Missed insight",
+        ]
+        assert result[0]["feedback_type"] == "nugget"
+        assert result[1]["feedback_type"] == "missing_content"
+        assert result[1]["suggested_type"] == "analogy"
+
+    async def test_get_provider_current_prompt_not_found(self, manager, sqlite_db):
+        """Test getting current prompt when none exists"""
+        result = await manager.get_provider_current_prompt(sqlite_db, "anthropic")
+
+        assert result is None
+
+    async def test_get_provider_current_prompt_found(self, manager, sqlite_db):
+        """Test getting current prompt when it exists"""
+        await sqlite_db.execute(
+            """
+            INSERT INTO optimized_prompts
+            (id, version, prompt, created_at, feedback_count, positive_rate,
+             model_provider, model_name, is_current, optimization_mode,
+             optimization_run_id)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            """,
+            (
+                "prompt-id-123",
+                5,
+                "Optimized prompt text",
+                "2025-01-31T12:00:00Z",
+                100,
+                0.85,
+                "anthropic",
+                "claude-3-5-sonnet",
+                True,
+                "cheap",
+                "baseline-run-001",
+            ),
+        )
+        await sqlite_db.commit()
+
+        result = await manager.get_provider_current_prompt(sqlite_db, "anthropic")
+
+        assert result is not None
+        assert result["id"] == "prompt-id-123"
+        assert result["version"] == 5
+        assert result["provider_id"] == "anthropic"
+        assert result["model_name"] == "claude-3-5-sonnet"
+        assert result["performance"]["feedbackCount"] == 100
+
+    @patch("app.services.dspy_multi_model_manager.DSPY_AVAILABLE", new=True)
+    async def test_optimize_for_provider_keeps_unchanged_prompt(
+        self, manager, sqlite_db
+    ):
+        """Test that re-optimizing to the current prompt text stores no new row"""
+        await sqlite_db.execute(
+            """
+            INSERT INTO optimized_prompts
+            (id, version, prompt, created_at, feedback_count, positive_rate,
+             model_provider, model_name, is_current, optimization_mode,
+             optimization_run_id)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            """,
+            (
+                "current-prompt-id",
+                3,
+                "Same optimized prompt",
+                "2025-01-31T12:00:00Z",
+                60,
+                0.8,
+                "openai",
+                "gpt-4o-mini",
+                True,
+                "cheap",
+                "baseline-run-001",
+            ),
+        )
+        await sqlite_db.commit()
+
+        optimization_result = {
+            "optimized_prompt": "Same optimized prompt",
+            "performance_score": 0.8,
+            "improvement": 0.0,
+            "training_examples_count": 60,
+        }
+        models = AsyncMock(return_value=["gpt-4o-mini"])
+        feedback = AsyncMock(return_value=[{}] * manager.min_feedback_threshold)
+        run = Mock(return_value=optimization_result)
+        with patch.object(manager, "_get_user_models_for_provider", models):
+            with patch.object(manager, "_get_provider_model_feedback", feedback):
+                with patch.object(manager, "_run_provider_model_optimization", run):
+                    result = await manager.optimize_for_provider(sqlite_db, "openai")
+
+        [model_result] = result["model_results"]
+        assert model_result["optimized_prompt_id"] == "current-prompt-id"
+
+        cursor = await sqlite_db.execute(
+            """
+            SELECT id, version, is_current FROM optimized_prompts
+            WHERE model_provider = 'openai'
+            """
+        )
+        assert await cursor.fetchall() == [("current-prompt-id", 3, 1)]
+
+        cursor = await sqlite_db.execute(
+            "SELECT status FROM optimization_runs WHERE model_provider = 'openai'"
+        )
+        assert await cursor.fetchall() == [("completed",)]
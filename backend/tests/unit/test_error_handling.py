@@ -10,36 +10,102 @@ import sqlite3
 from unittest.mock import AsyncMock, MagicMock, patch
 
 import aiosqlite
+from pydantic import ValidationError
 import pytest
 
 from app.models import MissingContentFeedback, NuggetFeedback
 from app.services.cost_tracking_service import CostTrackingService
 from app.services.feedback_service import FeedbackService
-from app.services.optimization_service import OptimizationService
 from app.services.progress_tracking_service import ProgressTrackingService
 
+MALFORMED_NUGGET_CASES = [
+    pytest.param({"id": "", "nuggetContent": "test"}, id="empty-id"),
+    pytest.param({"id": "test", "nuggetContent": ""}, id="empty-content"),
+    pytest.param(
+        {"id": "test", "nuggetContent": "test", "rating": "invalid"},
+        id="invalid-rating",
+    ),
+    pytest.param(
+        {
+            "id": "test",
+            "nuggetContent": "test",
+            "rating": "positive",
+            "timestamp": "invalid",
+        },
+        id="invalid-timestamp",
+    ),
+]
+
+MALFORMED_MISSING_CONTENT_CASES = [
+    pytest.param(
+        {"id": "test", "content": "", "suggestedType": "tool"}, id="empty-content"
+    ),
+    pytest.param(
+        {"id": "test", "content": "test", "suggestedType": "invalid"},
+        id="invalid-type",
+    ),
+    pytest.param({"id": "", "content": "test", "suggestedType": "tool"}, id="empty-id"),
+]
+
+# 1MB of nugget content, built once at import. The service has no size limit,
+# and the mock DB never serializes the payload, so only its length matters.
+LARGE_CONTENT = "x" * 1_000_000
+
+# The services keep no per-call state beyond in-memory bookkeeping that no test
+# here inspects across tests, so one instance of each serves the whole module
+
+
+@pytest.fixture(scope="module")
+def feedback_service():
+    return FeedbackService()
+
+
+@pytest.fixture(scope="module")
+def cost_tracking_service():
+    return CostTrackingService()
+
+
+@pytest.fixture(scope="module")
+def progress_tracking_service():
+    return ProgressTrackingService()
+
+
+@pytest.fixture(scope="module")
+def make_mock_db():
+    """Factory for mock DBs whose execute returns a cursor with canned rows,
+    or raises execute_side_effect when one is given"""
+
+    def _make_mock_db(fetchone=None, fetchall=(), execute_side_effect=None):
+        db = AsyncMock()
+        if execute_side_effect is not None:
+            db.execute.side_effect = execute_side_effect
+        else:
+            cursor = db.execute.return_value = AsyncMock()
+            cursor.fetchone.return_value = fetchone
+            cursor.fetchall.return_value = list(fetchall)
+        return db
+
+    return _make_mock_db
+
 
 class TestDatabaseErrorHandling:
     """Test how services handle database errors gracefully"""
 
     @pytest.fixture
-    def feedback_service(self):
-        return FeedbackService()
-
-    @pytest.fixture
-    def mock_db_connection_error(self):
+    def mock_db_connection_error(self, make_mock_db):
         """Mock database that raises connection errors"""
-        db = AsyncMock()
-        db.execute.side_effect = aiosqlite.DatabaseError("Connection failed")
+        db = make_mock_db(
+            execute_side_effect=aiosqlite.DatabaseError("Connection failed")
+        )
         db.commit.side_effect = aiosqlite.DatabaseError("Connection failed")
         return db
 
     @pytest.fixture
-    def mock_db_integrity_error(self):
+    def mock_db_integrity_error(self, make_mock_db):
         """Mock database that raises integrity constraint errors"""
-        db = AsyncMock()
-        db.execute.side_effect = sqlite3.IntegrityError("UNIQUE constraint failed")
-        return db
+        return make_mock_db(
+            execute_side_effect=sqlite3.IntegrityError("UNIQUE constraint failed")
+        )
 
     @pytest.fixture
     def sample_nugget_feedback(self):
@@ -83,14 +149,12 @@ class TestDatabaseErrorHandling:
         assert "UNIQUE constraint failed" in str(exc_info.value)
 
     @pytest.mark.asyncio
-    async def test_feedback_stats_with_corrupted_database(self, feedback_service):
+    async def test_feedback_stats_with_corrupted_database(
+        self, feedback_service, make_mock_db
+    ):
         """Test feedback stats when database returns unexpected data"""
-        mock_db = AsyncMock()
-        mock_cursor = AsyncMock()
-
         # Mock corrupted/unexpected data from database
-        mock_cursor.fetchone.return_value = None  # Missing expected data
-        mock_db.execute.return_value = mock_cursor
+        mock_db = make_mock_db(fetchone=None)  # Missing expected data
 
         # Should handle missing data gracefully
         stats = await feedback_service.get_feedback_stats(mock_db)
@@ -102,13 +166,14 @@ class TestDatabaseErrorHandling:
         assert stats["shouldOptimize"] is False
 
     @pytest.mark.asyncio
-    async def test_optimization_service_database_unavailable(self):
+    async def test_optimization_service_database_unavailable(
+        self, optimization_service, make_mock_db
+    ):
         """Test optimization service when database is unavailable"""
-        optimization_service = OptimizationService()
-
         # Mock database that fails to connect
-        mock_db = AsyncMock()
-        mock_db.execute.side_effect = aiosqlite.DatabaseError("Database unavailable")
+        mock_db = make_mock_db(
+            execute_side_effect=aiosqlite.DatabaseError("Database unavailable")
+        )
 
         # Should handle database errors during optimization
         with pytest.raises(Exception) as exc_info:
@@ -123,17 +188,12 @@ class TestDatabaseErrorHandling:
 class TestExternalServiceErrorHandling:
     """Test handling of external service failures (DSPy, Gemini API)"""
 
-    @pytest.fixture
-    def optimization_service(self):
-        return OptimizationService()
-
     @pytest.mark.asyncio
-    async def test_dspy_unavailable_graceful_degradation(self, optimization_service):
+    async def test_dspy_unavailable_graceful_degradation(
+        self, optimization_service, make_mock_db
+    ):
         """Test optimization when DSPy is not available"""
-        mock_db = AsyncMock()
-        mock_cursor = AsyncMock()
-        mock_cursor.fetchall.return_value = []  # No training examples
-        mock_db.execute.return_value = mock_cursor
+        mock_db = make_mock_db(fetchall=[])  # No training examples
 
         # Should handle missing training examples gracefully (raises exception)
         with pytest.raises(Exception) as exc_info:
@@ -158,17 +218,23 @@ class TestExternalServiceErrorHandling:
         assert "DSPy environment not configured" in result["error"]
 
     @pytest.mark.asyncio
-    async def test_gemini_api_timeout_handling(self, optimization_service):
+    async def test_gemini_api_timeout_handling(
+        self, optimization_service, make_mock_db
+    ):
         """Test handling of Gemini API timeouts during optimization"""
-        mock_db = AsyncMock()
-
         # Mock training examples available
-        mock_cursor = AsyncMock()
-        mock_cursor.fetchall.return_value = [
-            ("example-1", "test content", '{"golden_nuggets": []}', 0.8, "2024-01-01")
-            for _ in range(20)  # Sufficient training examples
-        ]
-        mock_db.execute.return_value = mock_cursor
+        mock_db = make_mock_db(
+            fetchall=[
+                (
+                    "example-1",
+                    "test content",
+                    '{"golden_nuggets": []}',
+                    0.8,
+                    "2024-01-01",
+                )
+                for _ in range(20)  # Sufficient training examples
+            ]
+        )
 
         # Should handle timeout errors (current implementation raises exception)
         with pytest.raises(Exception) as exc_info:
@@ -181,12 +247,12 @@ class TestExternalServiceErrorHandling:
         assert "failed" in error_msg.lower() or "error" in error_msg.lower()
 
     @pytest.mark.asyncio
-    async def test_gemini_api_rate_limit_handling(self, optimization_service):
+    async def test_gemini_api_rate_limit_handling(
+        self, optimization_service, make_mock_db
+    ):
         """Test handling of Gemini API rate limits"""
-        mock_db = AsyncMock()
-        mock_cursor = AsyncMock()
-        mock_cursor.fetchall.return_value = []  # No training examples to trigger graceful handling
-        mock_db.execute.return_value = mock_cursor
+        # No training examples to trigger graceful handling
+        mock_db = make_mock_db(fetchall=[])
 
         # Simulate rate limit scenario (no training examples triggers early exit)
         with pytest.raises(Exception) as exc_info:
@@ -201,60 +267,17 @@ class TestExternalServiceErrorHandling:
 class TestInputValidationErrorHandling:
     """Test handling of malformed or invalid input data"""
 
-    @pytest.fixture
-    def feedback_service(self):
-        return FeedbackService()
-
-    @pytest.fixture
-    def cost_tracking_service(self):
-        return CostTrackingService()
-
-    @pytest.fixture
-    def progress_tracking_service(self):
-        return ProgressTrackingService()
-
-    def test_malformed_nugget_feedback_handling(self):
+    @pytest.mark.parametrize("malformed_data", MALFORMED_NUGGET_CASES)
+    def test_malformed_nugget_feedback_handling(self, malformed_data):
         """Test handling of malformed nugget feedback data"""
-        from pydantic import ValidationError
-
-        # Test various malformed feedback scenarios
-        malformed_cases = [
-            {"id": "", "nuggetContent": "test"},  # Empty ID
-            {"id": "test", "nuggetContent": ""},  # Empty content
-            {
-                "id": "test",
-                "nuggetContent": "test",
-                "rating": "invalid",
-            },  # Invalid rating
-            {
-                "id": "test",
-                "nuggetContent": "test",
-                "rating": "positive",
-                "timestamp": "invalid",
-            },  # Invalid timestamp
-        ]
-
-        for malformed_data in malformed_cases:
-            with pytest.raises(ValidationError):
-                NuggetFeedback(**malformed_data)
-
-    def test_malformed_missing_content_feedback_handling(self):
+        with pytest.raises(ValidationError):
+            NuggetFeedback(**malformed_data)
+
+    @pytest.mark.parametrize("malformed_data", MALFORMED_MISSING_CONTENT_CASES)
+    def test_malformed_missing_content_feedback_handling(self, malformed_data):
         """Test handling of malformed missing content feedback"""
-        from pydantic import ValidationError
-
-        malformed_cases = [
-            {"id": "test", "content": "", "suggestedType": "tool"},  # Empty content
-            {
-                "id": "test",
-                "content": "test",
-                "suggestedType": "invalid",
-            },  # Invalid type
-            {"id": "", "content": "test", "suggestedType": "tool"},  # Empty ID
-        ]
-
-        for malformed_data in malformed_cases:
-            with pytest.raises(ValidationError):
-                MissingContentFeedback(**malformed_data)
+        with pytest.raises(ValidationError):
+            MissingContentFeedback(**malformed_data)
 
     @pytest.mark.asyncio
     async def test_cost_tracking_invalid_parameters(self, cost_tracking_service):
@@ -313,50 +336,50 @@ class TestInputValidationErrorHandling:
 class TestConcurrentOperationErrorHandling:
     """Test handling of concurrent operation conflicts"""
 
-    @pytest.fixture
-    def optimization_service(self):
-        return OptimizationService()
-
     @pytest.mark.asyncio
-    async def test_concurrent_optimization_requests(self, optimization_service):
-        """Test handling multiple concurrent optimization requests"""
-        mock_db = AsyncMock()
-        mock_cursor = AsyncMock()
-        mock_cursor.fetchall.return_value = []  # No training examples
-        mock_db.execute.return_value = mock_cursor
-
-        # Create multiple concurrent optimization tasks
-        tasks = []
-        for _i in range(5):  # More than ThreadPoolExecutor max_workers (2)
-            task = optimization_service.run_optimization(
-                mock_db, "cheap", auto_trigger=True
-            )
-            tasks.append(task)
+    # Both batches exceed the service's ThreadPoolExecutor max_workers (2)
+    @pytest.mark.parametrize("n_tasks", [3, 5])
+    async def test_concurrent_optimization_requests(
+        self, optimization_service, make_mock_db, n_tasks
+    ):
+        """Test handling more concurrent optimization requests than workers"""
+        mock_db = make_mock_db(fetchall=[])  # No training examples
 
         # Should handle all requests without hanging or crashing
-        results = await asyncio.gather(*tasks, return_exceptions=True)
+        results = await asyncio.gather(
+            *(
+                optimization_service.run_optimization(
+                    mock_db, "cheap", auto_trigger=True
+                )
+                for _ in range(n_tasks)
+            ),
+            return_exceptions=True,
+        )
 
         # All should complete (either successfully or with errors)
-        assert len(results) == 5
+        assert len(results) == n_tasks
 
         # Each should either return a result dict or raise an exception
         for result in results:
             if isinstance(result, Exception):
                 # Expected due to no training examples or resource constraints
-                assert "training examples" in str(result) or "DSPy" in str(result)
+                message = str(result)
+                assert any(
+                    reason in message
+                    for reason in ("training examples", "DSPy", "thread", "executor")
+                )
             else:
                 # Should be a valid result dict
                 assert isinstance(result, dict)
                 assert "error" in result or "success" in result
 
     @pytest.mark.asyncio
-    async def test_database_lock_timeout_handling(self):
+    async def test_database_lock_timeout_handling(self, feedback_service, make_mock_db):
         """Test handling of database lock timeouts"""
-        feedback_service = FeedbackService()
-
         # Mock database that simulates lock timeout
-        mock_db = AsyncMock()
-        mock_db.execute.side_effect = sqlite3.OperationalError("database is locked")
+        mock_db = make_mock_db(
+            execute_side_effect=sqlite3.OperationalError("database is locked")
+        )
 
         sample_feedback = NuggetFeedback(
             id="lock-test",
@@ -381,17 +404,12 @@ class TestResourceConstraintErrorHandling:
     """Test handling of resource constraints and limits"""
 
     @pytest.mark.asyncio
-    async def test_large_content_handling(self):
+    async def test_large_content_handling(self, feedback_service, make_mock_db):
         """Test handling of oversized content inputs"""
-        feedback_service = FeedbackService()
-        mock_db = AsyncMock()
-
         # Create feedback with very large content
-        large_content = "x" * 1000000  # 1MB of content
-
         large_feedback = NuggetFeedback(
             id="large-content-test",
-            nuggetContent=large_content,
+            nuggetContent=LARGE_CONTENT,
             originalType="tool",
             rating="positive",
             timestamp=1642780800000,
@@ -402,13 +420,15 @@ class TestResourceConstraintErrorHandling:
         )
 
         # Should handle large content (current implementation stores full content)
-        mock_cursor = AsyncMock()
-        mock_cursor.fetchone.return_value = None  # No existing record
-        mock_db.execute.return_value = mock_cursor
+        mock_db = make_mock_db(fetchone=None)  # No existing record
 
         # Should not crash with large content
         result = await feedback_service.store_nugget_feedback(mock_db, large_feedback)
         assert result == "new"
+        # ...and should hand it to the database untruncated
+        assert any(
+            LARGE_CONTENT in call.args[1] for call in mock_db.execute.call_args_list
+        )
 
     def test_memory_intensive_operations(self):
         """Test handling of memory-intensive operations"""
@@ -426,32 +446,3 @@ class TestResourceConstraintErrorHandling:
             assert "input_content" in item
             assert "expected_output" in item
             assert "feedback_score" in item
-
-    @pytest.mark.asyncio
-    async def test_thread_pool_exhaustion_handling(self):
-        """Test handling when ThreadPoolExecutor is exhausted"""
-        optimization_service = OptimizationService()
-
-        # The optimization service uses ThreadPoolExecutor with max_workers=2
-        # This test verifies graceful handling when all workers are busy
-
-        mock_db = AsyncMock()
-        mock_cursor = AsyncMock()
-        mock_cursor.fetchall.return_value = []
-        mock_db.execute.return_value = mock_cursor
-
-        # Submit more tasks than available workers
-        tasks = []
-        for _i in range(3):  # More than max_workers=2
-            task = optimization_service.run_optimization(
-                mock_db, "cheap", auto_trigger=True
-            )
-            tasks.append(task)
-
-        # Should handle queue overflow gracefully
-        try:
-            results = await asyncio.gather(*tasks, return_exceptions=True)
-            assert len(results) == 3
-        except Exception as e:
-            # If thread pool exhaustion occurs, should get meaningful error
-            assert "thread" in str(e).lower() or "executor" in str(e).lower()
@@ -0,0 +1,124 @@
+"""
+Unit tests for ImprovedCostTrackingService.
+
+Runs the batched DSPy cost tracking against a real, freshly migrated SQLite
+database, including the rollback when one of the batched inserts fails.
+"""
+
+from types import SimpleNamespace
+
+import pytest
+import pytest_asyncio
+
+from app.database import get_db
+from app.services.improved_cost_tracking_service import ImprovedCostTrackingService
+
+RUN_ID = "cost-run-1"
+
+# Two LM calls, one per operation in the batch
+_HISTORY = [
+    {
+        "cost": 0.25,
+        "usage": {"prompt_tokens": 100, "completion_tokens": 20},
+        "response_model": "gemini-2.5-flash",
+    },
+    {
+        "cost": 0.5,
+        "usage": {"prompt_tokens": 200, "completion_tokens": 40},
+        "response_model": "gemini-2.5-flash",
+    },
+]
+
+_OPERATIONS = [
+    {"operation_type": "optimization", "end_index": 1},
+    {"operation_type": "evaluation", "start_index": 1},
+]
+
+
+@pytest_asyncio.fixture
+async def db(clean_database):
+    """Connection to this test's migrated database, with one running run"""
+    async with get_db() as db:
+        await db.execute(
+            """
+            INSERT INTO optimization_runs (id, mode, trigger_type, feedback_count)
+            VALUES (?, 'cheap', 'manual', 0)
+            """,
+            (RUN_ID,),
+        )
+        await db.commit()
+        yield db
+
+
+class TestTrackDSPyOperationsCost:
+    """Test batched cost tracking for several operations of one run"""
+
+    @pytest.fixture
+    def cost_service(self):
+        """Create a cost tracking service instance"""
+        return ImprovedCostTrackingService()
+
+    @pytest.fixture
+    def lm(self):
+        """DSPy LM stand-in; only its history is read"""
+        return SimpleNamespace(history=list(_HISTORY))
+
+    async def test_batch_writes_one_row_per_operation(self, cost_service, db, lm):
+        """Test that each operation gets its own cost_tracking row"""
+        breakdowns = await cost_service.track_dspy_operations_cost(
+            db, lm, RUN_ID, _OPERATIONS
+        )
+
+        cursor = await db.execute(
+            """
+            SELECT id, operation_type, input_tokens, output_tokens, cost_usd
+            FROM cost_tracking
+            WHERE optimization_run_id = ?
+            ORDER BY operation_type
+            """,
+            (RUN_ID,),
+        )
+        rows = await cursor.fetchall()
+
+        assert [row[1:] for row in rows] == [
+            ("evaluation", 200, 40, 0.5),
+            ("optimization", 100, 20, 0.25),
+        ]
+        assert {row[0] for row in rows} == {b["cost_id"] for b in breakdowns}
+        assert not db.in_transaction
+
+    async def test_batch_updates_run_totals(self, cost_service, db, lm):
+        """Test that the run's cost and token totals cover the whole batch"""
+        await cost_service.track_dspy_operations_cost(db, lm, RUN_ID, _OPERATIONS)
+
+        cursor = await db.execute(
+            """
+            SELECT api_cost, total_tokens, input_tokens, output_tokens
+            FROM optimization_runs
+            WHERE id = ?
+            """,
+            (RUN_ID,),
+        )
+
+        assert await cursor.fetchone() == (0.75, 360, 300, 60)
+
+    async def test_failed_insert_rolls_back_batch(self, cost_service, db, lm):
+        """Test that a failing insert leaves no rows and no open transaction"""
+        # The second operation violates the operation_type CHECK constraint
+        failing = [_OPERATIONS[0], {"operation_type": "unknown", "start_index": 1}]
+
+        with pytest.raises(Exception, match="CHECK constraint failed"):
+            await cost_service.track_dspy_operations_cost(db, lm, RUN_ID, failing)
+
+        assert not db.in_transaction
+        cursor = await db.execute("SELECT COUNT(*) FROM cost_tracking")
+        assert await cursor.fetchone() == (0,)
+
+        # The connection is usable for the next batch
+        breakdowns = await cost_service.track_dspy_operations_cost(
+            db, lm, RUN_ID, _OPERATIONS
+        )
+
+        assert len(breakdowns) == 2
+        cursor = await db.execute("SELECT COUNT(*) FROM cost_tracking")
+        assert await cursor.fetchone() == (2,)
@@ -6,6 +6,7 @@ Tests both the optimization service and DSPy configuration.
 
 import asyncio
 import json
+import logging.handlers
 from unittest.mock import Mock, patch
 
 import pytest
@@ -14,18 +15,30 @@ from app.database import get_db
 from app.services.dspy_config import (
     OptimizationMetrics,
     generate_mock_feedback_data,
-    validate_dspy_environment,
 )
 from app.services.feedback_service import FeedbackService
-from app.services.optimization_service import OptimizationService
+from app.services.optimization_service import logger as optimization_logger
+
+INSERT_PROMPT_SQL = """
+    INSERT INTO optimized_prompts
+    (id, version, prompt, created_at, feedback_count, positive_rate,
+     model_provider, model_name, is_current, optimization_mode, optimization_run_id)
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+"""
+
+
+async def insert_prompts(db, rows):
+    """Insert optimized_prompts rows with a single executemany, then commit"""
+    await db.executemany(INSERT_PROMPT_SQL, rows)
+    await db.commit()
 
 
 class TestDSPyConfiguration:
     """Test DSPy configuration and utilities"""
 
-    def test_environment_validation(self):
+    def test_environment_validation(self, dspy_env_status):
         """Test DSPy environment validation"""
-        status = validate_dspy_environment()
+        status = dspy_env_status
 
         # Should have required keys
         assert "dspy_available" in status
@@ -115,26 +128,28 @@ class TestOptimizationService:
                 assert 0.0 <= example["feedback_score"] <= 1.0
 
     @pytest.mark.asyncio
-    async def test_optimization_service_initialization(self):
+    async def test_optimization_service_initialization(self, optimization_service):
         """Test optimization service initialization"""
-        service = OptimizationService()
-
         # Should have chrome extension default prompt
-        assert service.chrome_extension_default_prompt
-        assert len(service.chrome_extension_default_prompt) > 100  # Should be substantial
+        assert optimization_service.chrome_extension_default_prompt
+        assert (
+            len(optimization_service.chrome_extension_default_prompt) > 100
+        )  # Should be substantial
 
         # Should have executor for background tasks
-        assert service.executor is not None
+        assert optimization_service.executor is not None
 
     @pytest.mark.asyncio
-    async def test_optimization_with_insufficient_data(self, clean_database):
+    async def test_optimization_with_insufficient_data(
+        self, clean_database, optimization_service
+    ):
         """Test optimization with insufficient training data"""
-        service = OptimizationService()
-
         async with get_db() as db:
             # Try optimization with no data - should raise exception
             try:
-                result = await service.run_optimization(db, "cheap", auto_trigger=True)
+                result = await optimization_service.run_optimization(
+                    db, "cheap", auto_trigger=True
+                )
                 # If we get a result dict, check for error
                 assert "error" in result
                 assert "Not enough training examples" in result["error"]
@@ -143,29 +158,48 @@ class TestOptimizationService:
                 assert "Not enough training examples" in str(e)
 
     @patch("app.services.dspy_config.DSPY_AVAILABLE", new=False)
-    def test_optimization_without_dspy(self):
+    def test_optimization_without_dspy(self, optimization_service):
         """Test optimization when DSPy is not available"""
-        service = OptimizationService()
-
         # Should handle missing DSPy gracefully
         mock_examples = generate_mock_feedback_data(10)
-        result = service._run_dspy_optimization(mock_examples, "cheap")
+        result = optimization_service._run_dspy_optimization(mock_examples, "cheap")
 
         assert "error" in result
         assert "DSPy environment not configured" in result["error"]
 
+    def test_progress_log_buffer_flushed_on_completion(self, optimization_service):
+        """Test that buffered progress records are written once a run completes"""
+        target = logging.handlers.BufferingHandler(capacity=100)
+        buffered = logging.handlers.MemoryHandler(capacity=100, target=target)
+
+        # Keep run-1 out of the session-shared service's progress registry
+        with patch.dict(optimization_service.active_runs, clear=True):
+            with patch.object(optimization_logger, "handlers", [buffered]):
+                optimization_service._log_progress(
+                    "run-1", "optimization", 50, "Optimizing"
+                )
+                assert target.buffer == []
+                progress = optimization_service.get_run_progress("run-1")
+                assert progress["progress"] == 50
+
+                optimization_service._log_progress("run-1", "completed", 100, "Done")
+
+        assert "run-1" not in optimization_service.active_runs
+        assert [record.getMessage() for record in target.buffer] == [
+            "📈 Optimizing (50%)",
+            "✅ Done",
+        ]
+
     @pytest.mark.asyncio
-    async def test_optimization_modes(self, clean_database):
+    async def test_optimization_modes(self, clean_database, optimization_service):
         """Test different optimization modes"""
-        service = OptimizationService()
-
         async with get_db() as db:
             # Test with mock data for both modes
             modes = ["cheap", "expensive"]
 
             for mode in modes:
                 try:
-                    result = await service.run_optimization(
+                    result = await optimization_service.run_optimization(
                         db, mode, auto_trigger=False
                     )
 
@@ -242,10 +276,11 @@ class TestOptimizationIntegration:
     """Integration tests for the complete optimization pipeline"""
 
     @pytest.mark.asyncio
-    async def test_end_to_end_optimization_flow(self, clean_database):
+    async def test_end_to_end_optimization_flow(
+        self, clean_database, optimization_service
+    ):
         """Test complete optimization flow from feedback to optimized prompt"""
         feedback_service = FeedbackService()
-        optimization_service = OptimizationService()
 
         async with get_db() as db:
             # 1. Generate and store mock feedback data
@@ -288,10 +323,10 @@ class TestOptimizationIntegration:
             assert isinstance(history["runs"], list)
 
     @pytest.mark.asyncio
-    async def test_concurrent_optimization_handling(self, clean_database):
+    async def test_concurrent_optimization_handling(
+        self, clean_database, optimization_service
+    ):
         """Test handling of concurrent optimization requests"""
-        optimization_service = OptimizationService()
-
         async with get_db() as db:
             # The optimization service uses a ThreadPoolExecutor with max_workers=2
             # This should handle concurrent requests gracefully
@@ -324,34 +359,30 @@ class TestProviderModelOptimizationRetrieval:
     """Test provider+model specific optimization prompt retrieval"""
 
     @pytest.mark.asyncio
-    async def test_get_provider_specific_optimization(self, clean_database):
+    async def test_get_provider_specific_optimization(
+        self, clean_database, optimization_service
+    ):
         """Test retrieval of provider-specific optimized prompt"""
-        optimization_service = OptimizationService()
-
         async with get_db() as db:
             # Insert a provider-specific optimized prompt
-            await db.execute(
-                """
-                INSERT INTO optimized_prompts
-                (id, version, prompt, created_at, feedback_count, positive_rate,
-                 model_provider, model_name, is_current, optimization_mode, optimization_run_id)
-                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-            """,
-                (
-                    "test-openai-gpt4o-v1",
-                    1,
-                    "Provider-specific optimized prompt for OpenAI GPT-4o",
-                    "2025-01-31T12:00:00Z",
-                    15,
-                    0.85,
-                    "openai",
-                    "gpt-4o",
-                    True,
-                    "cheap",
-                    "baseline-run-001",
-                ),
+            await insert_prompts(
+                db,
+                [
+                    (
+                        "test-openai-gpt4o-v1",
+                        1,
+                        "Provider-specific optimized prompt for OpenAI GPT-4o",
+                        "2025-01-31T12:00:00Z",
+                        15,
+                        0.85,
+                        "openai",
+                        "gpt-4o",
+                        True,
+                        "cheap",
+                        "baseline-run-001",
+                    ),
+                ],
             )
-            await db.commit()
 
             # Test retrieval of provider-specific prompt
             result = await optimization_service.get_current_prompt_for_provider_model(
@@ -372,34 +403,30 @@ class TestProviderModelOptimizationRetrieval:
             assert "fallbackUsed" not in result
 
     @pytest.mark.asyncio
-    async def test_fallback_to_generic_optimization(self, clean_database):
+    async def test_fallback_to_generic_optimization(
+        self, clean_database, optimization_service
+    ):
         """Test fallback to generic optimized prompt when no provider-specific prompt exists"""
-        optimization_service = OptimizationService()
-
         async with get_db() as db:
             # Insert only a generic optimized prompt (no provider/model)
-            await db.execute(
-                """
-                INSERT INTO optimized_prompts
-                (id, version, prompt, created_at, feedback_count, positive_rate,
-                 model_provider, model_name, is_current, optimization_mode, optimization_run_id)
-                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-            """,
-                (
-                    "test-generic-v2",
-                    2,
-                    "Generic optimized prompt for all providers",
-                    "2025-01-31T12:00:00Z",
-                    25,
-                    0.75,
-                    None,  # No provider specified
-                    None,  # No model specified
-                    True,
-                    "cheap",
-                    "baseline-run-001",
-                ),
+            await insert_prompts(
+                db,
+                [
+                    (
+                        "test-generic-v2",
+                        2,
+                        "Generic optimized prompt for all providers",
+                        "2025-01-31T12:00:00Z",
+                        25,
+                        0.75,
+                        None,  # No provider specified
+                        None,  # No model specified
+                        True,
+                        "cheap",
+                        "baseline-run-001",
+                    ),
+                ],
             )
-            await db.commit()
 
             # Test retrieval falls back to generic prompt
             result = await optimization_service.get_current_prompt_for_provider_model(
@@ -418,61 +445,46 @@ class TestProviderModelOptimizationRetrieval:
 
     @pytest.mark.asyncio
     async def test_provider_specific_takes_precedence_over_generic(
-        self, clean_database
+        self, clean_database, optimization_service
     ):
         """Test that provider-specific prompt takes precedence over generic"""
-        optimization_service = OptimizationService()
-
         async with get_db() as db:
             # Clear existing current prompts first
             await db.execute("UPDATE optimized_prompts SET is_current = FALSE")
             await db.commit()
 
             # Insert both generic and provider-specific prompts
-            await db.execute(
-                """
-                INSERT INTO optimized_prompts
-                (id, version, prompt, created_at, feedback_count, positive_rate,
-                 model_provider, model_name, is_current, optimization_mode, optimization_run_id)
-                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-            """,
-                (
-                    "test-generic-v1",
-                    1,
-                    "Generic optimized prompt",
-                    "2025-01-31T11:00:00Z",
-                    20,
-                    0.70,
-                    None,
-                    None,
-                    True,
-                    "cheap",
-                    "baseline-run-001",
-                ),
-            )
-
-            await db.execute(
-                """
-                INSERT INTO optimized_prompts
-                (id, version, prompt, created_at, feedback_count, positive_rate,
-                 model_provider, model_name, is_current, optimization_mode, optimization_run_id)
-                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-            """,
-                (
-                    "test-gemini-flash-v1",
-                    1,
-                    "Gemini 2.5-flash specific optimized prompt",
-                    "2025-01-31T12:00:00Z",
-                    12,
-                    0.90,
-                    "gemini",
-                    "gemini-2.5-flash",
-                    True,
-                    "expensive",
-                    "baseline-run-001",
-                ),
+            await insert_prompts(
+                db,
+                [
+                    (
+                        "test-generic-v1",
+                        1,
+                        "Generic optimized prompt",
+                        "2025-01-31T11:00:00Z",
+                        20,
+                        0.70,
+                        None,
+                        None,
+                        True,
+                        "cheap",
+                        "baseline-run-001",
+                    ),
+                    (
+                        "test-gemini-flash-v1",
+                        1,
+                        "Gemini 2.5-flash specific optimized prompt",
+                        "2025-01-31T12:00:00Z",
+                        12,
+                        0.90,
+                        "gemini",
+                        "gemini-2.5-flash",
+                        True,
+                        "expensive",
+                        "baseline-run-001",
+                    ),
+                ],
             )
-            await db.commit()
 
             # Test that provider-specific prompt is returned
             result = await optimization_service.get_current_prompt_for_provider_model(
@@ -487,10 +499,10 @@ class TestProviderModelOptimizationRetrieval:
             assert "fallbackUsed" not in result
 
     @pytest.mark.asyncio
-    async def test_no_optimization_available(self, clean_database):
+    async def test_no_optimization_available(
+        self, clean_database, optimization_service
+    ):
         """Test when no optimization is available at all"""
-        optimization_service = OptimizationService()
-
         async with get_db() as db:
             # Don't insert any optimized prompts
             result = await optimization_service.get_current_prompt_for_provider_model(
@@ -500,34 +512,30 @@ class TestProviderModelOptimizationRetrieval:
             assert result is None
 
     @pytest.mark.asyncio
-    async def test_only_non_current_optimizations_exist(self, clean_database):
+    async def test_only_non_current_optimizations_exist(
+        self, clean_database, optimization_service
+    ):
         """Test when optimizations exist but none are marked as current"""
-        optimization_service = OptimizationService()
-
         async with get_db() as db:
             # Insert an optimization that is not current
-            await db.execute(
-                """
-                INSERT INTO optimized_prompts
-                (id, version, prompt, created_at, feedback_count, positive_rate,
-                 model_provider, model_name, is_current, optimization_mode, optimization_run_id)
-                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-            """,
-                (
-                    "test-old-v1",
-                    1,
-                    "Old optimization prompt",
-                    "2025-01-30T12:00:00Z",
-                    10,
-                    0.60,
-                    "anthropic",
-                    "claude-3-5-sonnet-20241022",
-                    False,  # Not current
-                    "cheap",
-                    "baseline-run-001",
-                ),
+            await insert_prompts(
+                db,
+                [
+                    (
+                        "test-old-v1",
+                        1,
+                        "Old optimization prompt",
+                        "2025-01-30T12:00:00Z",
+                        10,
+                        0.60,
+                        "anthropic",
+                        "claude-3-5-sonnet-20241022",
+                        False,  # Not current
+                        "cheap",
+                        "baseline-run-001",
+                    ),
+                ],
             )
-            await db.commit()
 
             # Should return None since no current optimization exists
             result = await optimization_service.get_current_prompt_for_provider_model(
@@ -537,20 +545,15 @@ class TestProviderModelOptimizationRetrieval:
             assert result is None
 
     @pytest.mark.asyncio
-    async def test_multiple_versions_returns_latest(self, clean_database):
+    async def test_multiple_versions_returns_latest(
+        self, clean_database, optimization_service
+    ):
         """Test that when multiple versions exist, the latest is returned"""
-        optimization_service = OptimizationService()
-
         async with get_db() as db:
             # Insert multiple versions for the same provider+model
-            for version in [1, 2, 3]:
-                await db.execute(
-                    """
-                    INSERT INTO optimized_prompts
-                    (id, version, prompt, created_at, feedback_count, positive_rate,
-                     model_provider, model_name, is_current, optimization_mode, optimization_run_id)
-                    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-                """,
+            await insert_prompts(
+                db,
+                [
                     (
                         f"test-openai-v{version}",
                         version,
@@ -563,9 +566,10 @@ class TestProviderModelOptimizationRetrieval:
                         True,  # All marked as current for this test
                         "cheap",
                         "baseline-run-001",
-                    ),
-                )
-            await db.commit()
+                    )
+                    for version in [1, 2, 3]
+                ],
+            )
 
             # Should return the latest version (v3)
             result = await optimization_service.get_current_prompt_for_provider_model(
@@ -579,38 +583,34 @@ class TestProviderModelOptimizationRetrieval:
             assert result["performance"]["positiveRate"] == 0.85
 
     @pytest.mark.asyncio
-    async def test_empty_string_provider_model_treated_as_null(self, clean_database):
+    async def test_empty_string_provider_model_treated_as_null(
+        self, clean_database, optimization_service
+    ):
         """Test that empty string provider/model values are treated as NULL (generic)"""
-        optimization_service = OptimizationService()
-
         async with get_db() as db:
             # Clear existing current prompts first
             await db.execute("UPDATE optimized_prompts SET is_current = FALSE")
             await db.commit()
 
             # Insert prompt with empty string provider/model (should be treated as generic)
-            await db.execute(
-                """
-                INSERT INTO optimized_prompts
-                (id, version, prompt, created_at, feedback_count, positive_rate,
-                 model_provider, model_name, is_current, optimization_mode, optimization_run_id)
-                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-            """,
-                (
-                    "test-empty-string",
-                    1,
-                    "Prompt with empty string provider",
-                    "2025-01-31T12:00:00Z",
-                    18,
-                    0.80,
-                    "",  # Empty string provider
-                    "",  # Empty string model
-                    True,
-                    "cheap",
-                    "baseline-run-001",
-                ),
+            await insert_prompts(
+                db,
+                [
+                    (
+                        "test-empty-string",
+                        1,
+                        "Prompt with empty string provider",
+                        "2025-01-31T12:00:00Z",
+                        18,
+                        0.80,
+                        "",  # Empty string provider
+                        "",  # Empty string model
+                        True,
+                        "cheap",
+                        "baseline-run-001",
+                    ),
+                ],
             )
-            await db.commit()
 
             # Should find this as a generic fallback
             result = await optimization_service.get_current_prompt_for_provider_model(
@@ -624,34 +624,30 @@ class TestProviderModelOptimizationRetrieval:
             assert result["fallbackUsed"] is True
 
     @pytest.mark.asyncio
-    async def test_case_sensitivity_in_provider_model_matching(self, clean_database):
+    async def test_case_sensitivity_in_provider_model_matching(
+        self, clean_database, optimization_service
+    ):
         """Test that provider and model matching is case-sensitive"""
-        optimization_service = OptimizationService()
-
         async with get_db() as db:
             # Insert prompt with specific case
-            await db.execute(
-                """
-                INSERT INTO optimized_prompts
-                (id, version, prompt, created_at, feedback_count, positive_rate,
-                 model_provider, model_name, is_current, optimization_mode, optimization_run_id)
-                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-            """,
-                (
-                    "test-case-sensitive",
-                    1,
-                    "Case sensitive prompt",
-                    "2025-01-31T12:00:00Z",
-                    10,
-                    0.75,
-                    "openai",  # lowercase
-                    "gpt-4o-mini",  # lowercase with dashes
-                    True,
-                    "cheap",
-                    "baseline-run-001",
-                ),
+            await insert_prompts(
+                db,
+                [
+                    (
+                        "test-case-sensitive",
+                        1,
+                        "Case sensitive prompt",
+                        "2025-01-31T12:00:00Z",
+                        10,
+                        0.75,
+                        "openai",  # lowercase
+                        "gpt-4o-mini",  # lowercase with dashes
+                        True,
+                        "cheap",
+                        "baseline-run-001",
+                    ),
+                ],
             )
-            await db.commit()
 
             # Should match exact case
             result = await optimization_service.get_current_prompt_for_provider_model(